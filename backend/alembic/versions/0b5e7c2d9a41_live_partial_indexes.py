@@ -0,0 +1,54 @@
+"""live partial indexes
+
+Revision ID: 0b5e7c2d9a41
+Revises: f3a8d6b1e925
+Create Date: 2026-10-17 20:17:03.659128
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b5e7c2d9a41'
+down_revision: Union[str, Sequence[str], None] = 'f3a8d6b1e925'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The feed only ever reads published posts, so index just those rows.
+    op.create_index(
+        'ix_posts_live_created_at_id',
+        'posts',
+        [sa.text('created_at DESC'), sa.text('id DESC')],
+        postgresql_where=sa.text('is_published = true'),
+    )
+    op.drop_index('ix_posts_published_created_at_id', table_name='posts')
+    op.create_index(
+        'ix_comments_live_post_created_at',
+        'comments',
+        ['post_id', 'created_at', 'id'],
+        postgresql_where=sa.text('is_deleted = false'),
+    )
+    op.create_index(
+        'ix_comments_deleted_at',
+        'comments',
+        ['deleted_at'],
+        postgresql_where=sa.text('is_deleted = true'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_comments_deleted_at', table_name='comments')
+    op.drop_index('ix_comments_live_post_created_at', table_name='comments')
+    op.create_index(
+        'ix_posts_published_created_at_id',
+        'posts',
+        ['is_published', sa.text('created_at DESC'), sa.text('id DESC')],
+    )
+    op.drop_index('ix_posts_live_created_at_id', table_name='posts')
@@ -0,0 +1,28 @@
+"""sessions expires index
+
+Revision ID: 2c8d5f0b7e14
+Revises: 9e4b2a7f1c63
+Create Date: 2026-10-17 21:48:20.371552
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c8d5f0b7e14'
+down_revision: Union[str, Sequence[str], None] = '9e4b2a7f1c63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_sessions_expires', 'sessions', ['expires'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sessions_expires', table_name='sessions')
@@ -0,0 +1,32 @@
+"""posts keyset index
+
+Revision ID: 3f9a1c7d2b64
+Revises: b103e14b39dd
+Create Date: 2026-10-17 10:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c7d2b64'
+down_revision: Union[str, Sequence[str], None] = 'b103e14b39dd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_posts_published_created_at_id',
+        'posts',
+        ['is_published', sa.text('created_at DESC'), sa.text('id DESC')],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_posts_published_created_at_id', table_name='posts')
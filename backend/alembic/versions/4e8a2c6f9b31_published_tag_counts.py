@@ -0,0 +1,42 @@
+"""published tag counts
+
+Revision ID: 4e8a2c6f9b31
+Revises: 7b3d9f2e6a15
+Create Date: 2026-10-18 10:12:07.550183
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e8a2c6f9b31'
+down_revision: Union[str, Sequence[str], None] = '7b3d9f2e6a15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # tag_counts now only counts published posts.
+    op.execute('DELETE FROM tag_counts')
+    op.execute("""
+        INSERT INTO tag_counts (tag, post_count)
+        SELECT tag, count(DISTINCT posts.id)
+        FROM posts, unnest(posts.tags) AS tag
+        WHERE posts.is_published = true
+        GROUP BY tag
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DELETE FROM tag_counts')
+    op.execute("""
+        INSERT INTO tag_counts (tag, post_count)
+        SELECT tag, count(DISTINCT posts.id)
+        FROM posts, unnest(posts.tags) AS tag
+        GROUP BY tag
+    """)
@@ -0,0 +1,50 @@
+"""posts search vector
+
+Revision ID: 5d7b0e3a9c18
+Revises: 8c2e5d4f1a90
+Create Date: 2026-10-17 12:26:08.773915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d7b0e3a9c18'
+down_revision: Union[str, Sequence[str], None] = '8c2e5d4f1a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', posts_tags_text(tags)), 'B') || "
+    "setweight(to_tsvector('english', coalesce(content #>> '{}', '')), 'C')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # array_to_string is only STABLE, so generated columns need an IMMUTABLE wrapper.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION posts_tags_text(tags VARCHAR[])
+        RETURNS TEXT
+        LANGUAGE SQL IMMUTABLE PARALLEL SAFE
+        AS $$ SELECT coalesce(array_to_string(tags, ' '), '') $$
+    """)
+    op.add_column('posts', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(SEARCH_VECTOR_EXPRESSION, persisted=True),
+        nullable=True,
+    ))
+    op.create_index('ix_posts_search_vector', 'posts', ['search_vector'], postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_posts_search_vector', table_name='posts', postgresql_using='gin')
+    op.drop_column('posts', 'search_vector')
+    op.execute('DROP FUNCTION IF EXISTS posts_tags_text(VARCHAR[])')
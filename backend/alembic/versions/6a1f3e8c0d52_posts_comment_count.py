@@ -0,0 +1,39 @@
+"""posts comment count
+
+Revision ID: 6a1f3e8c0d52
+Revises: 0b5e7c2d9a41
+Create Date: 2026-10-17 20:41:12.508317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a1f3e8c0d52'
+down_revision: Union[str, Sequence[str], None] = '0b5e7c2d9a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('posts', sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute('''
+        UPDATE posts
+        SET comment_count = c.n
+        FROM (
+            SELECT post_id, count(*) AS n
+            FROM comments
+            WHERE is_deleted = false
+            GROUP BY post_id
+        ) c
+        WHERE posts.id = c.post_id
+    ''')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('posts', 'comment_count')
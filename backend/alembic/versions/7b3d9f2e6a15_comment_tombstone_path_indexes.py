@@ -0,0 +1,49 @@
+"""comment tombstone path indexes
+
+Revision ID: 7b3d9f2e6a15
+Revises: 2c8d5f0b7e14
+Create Date: 2026-10-17 23:14:52.608317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3d9f2e6a15'
+down_revision: Union[str, Sequence[str], None] = '2c8d5f0b7e14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('ix_comments_live_post_root_path', table_name='comments')
+    op.drop_index('ix_comments_live_post_path', table_name='comments')
+    op.create_index('ix_comments_post_path', 'comments', ['post_id', 'path'])
+    op.create_index(
+        'ix_comments_post_root_path',
+        'comments',
+        ['post_id', 'path'],
+        postgresql_where=sa.text('parent_id IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_comments_post_root_path', table_name='comments')
+    op.drop_index('ix_comments_post_path', table_name='comments')
+    op.create_index(
+        'ix_comments_live_post_path',
+        'comments',
+        ['post_id', 'path'],
+        postgresql_where=sa.text('is_deleted = false'),
+    )
+    op.create_index(
+        'ix_comments_live_post_root_path',
+        'comments',
+        ['post_id', 'path'],
+        postgresql_where=sa.text('is_deleted = false AND parent_id IS NULL'),
+    )
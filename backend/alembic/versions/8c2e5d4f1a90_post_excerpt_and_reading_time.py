@@ -0,0 +1,31 @@
+"""post excerpt and reading time
+
+Revision ID: 8c2e5d4f1a90
+Revises: 3f9a1c7d2b64
+Create Date: 2026-10-17 11:03:54.218640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c2e5d4f1a90'
+down_revision: Union[str, Sequence[str], None] = '3f9a1c7d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows are filled in afterwards with `python -m app.render`.
+    op.add_column('posts', sa.Column('excerpt', sa.String(), nullable=True))
+    op.add_column('posts', sa.Column('reading_time', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('posts', 'reading_time')
+    op.drop_column('posts', 'excerpt')
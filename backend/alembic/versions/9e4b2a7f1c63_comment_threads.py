@@ -0,0 +1,60 @@
+"""comment threads
+
+Revision ID: 9e4b2a7f1c63
+Revises: 6a1f3e8c0d52
+Create Date: 2026-10-17 21:02:38.114906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b2a7f1c63'
+down_revision: Union[str, Sequence[str], None] = '6a1f3e8c0d52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('comments', sa.Column('parent_id', sa.String(), nullable=True))
+    op.add_column('comments', sa.Column('path', sa.String(collation='C'), nullable=True))
+    op.add_column('comments', sa.Column('depth', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('comments', sa.Column('reply_count', sa.Integer(), server_default='0', nullable=False))
+    op.create_foreign_key('comments_parent_id_fkey', 'comments', 'comments', ['parent_id'], ['id'])
+    # Every existing comment is top level.
+    op.execute("UPDATE comments SET path = lpad(created_at::text, 10, '0') || id")
+    op.alter_column('comments', 'path', nullable=False)
+    op.create_index(
+        'ix_comments_parent_id',
+        'comments',
+        ['parent_id'],
+        postgresql_where=sa.text('parent_id IS NOT NULL'),
+    )
+    op.create_index(
+        'ix_comments_live_post_path',
+        'comments',
+        ['post_id', 'path'],
+        postgresql_where=sa.text('is_deleted = false'),
+    )
+    op.create_index(
+        'ix_comments_live_post_root_path',
+        'comments',
+        ['post_id', 'path'],
+        postgresql_where=sa.text('is_deleted = false AND parent_id IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_comments_live_post_root_path', table_name='comments')
+    op.drop_index('ix_comments_live_post_path', table_name='comments')
+    op.drop_index('ix_comments_parent_id', table_name='comments')
+    op.drop_constraint('comments_parent_id_fkey', 'comments', type_='foreignkey')
+    op.drop_column('comments', 'reply_count')
+    op.drop_column('comments', 'depth')
+    op.drop_column('comments', 'path')
+    op.drop_column('comments', 'parent_id')
@@ -0,0 +1,40 @@
+"""tag counts and tags index
+
+Revision ID: a41c6e8b7d25
+Revises: 5d7b0e3a9c18
+Create Date: 2026-10-17 13:41:19.065332
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41c6e8b7d25'
+down_revision: Union[str, Sequence[str], None] = '5d7b0e3a9c18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tag_counts',
+    sa.Column('tag', sa.String(), nullable=False),
+    sa.Column('post_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('tag')
+    )
+    op.execute("""
+        INSERT INTO tag_counts (tag, post_count)
+        SELECT tag, count(DISTINCT posts.id)
+        FROM posts, unnest(posts.tags) AS tag
+        GROUP BY tag
+    """)
+    op.create_index('ix_posts_tags', 'posts', ['tags'], postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_posts_tags', table_name='posts', postgresql_using='gin')
+    op.drop_table('tag_counts')
@@ -0,0 +1,42 @@
+"""slug counters
+
+Revision ID: c6f3b92e0a47
+Revises: a41c6e8b7d25
+Create Date: 2026-10-17 14:52:40.318256
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6f3b92e0a47'
+down_revision: Union[str, Sequence[str], None] = 'a41c6e8b7d25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('slug_counters',
+    sa.Column('base_slug', sa.String(), nullable=False),
+    sa.Column('counter', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('base_slug')
+    )
+    # Seed each base with the highest suffix already issued by the old
+    # LIKE-scan allocator, so new slugs continue after it.
+    op.execute(r"""
+        INSERT INTO slug_counters (base_slug, counter)
+        SELECT
+            regexp_replace(slug, '_\d+$', '') AS base_slug,
+            max(coalesce(substring(slug FROM '_(\d+)$')::int, 0)) AS counter
+        FROM posts
+        GROUP BY 1
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('slug_counters')
@@ -0,0 +1,30 @@
+"""updated_at export indexes
+
+Revision ID: d8e4a1f5c372
+Revises: c6f3b92e0a47
+Create Date: 2026-10-17 16:08:27.542981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8e4a1f5c372'
+down_revision: Union[str, Sequence[str], None] = 'c6f3b92e0a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_posts_updated_at_id', 'posts', ['updated_at', 'id'])
+    op.create_index('ix_comments_updated_at_id', 'comments', ['updated_at', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_comments_updated_at_id', table_name='comments')
+    op.drop_index('ix_posts_updated_at_id', table_name='posts')
@@ -0,0 +1,35 @@
+"""rendered content columns
+
+Revision ID: e2b7c9d4f816
+Revises: d8e4a1f5c372
+Create Date: 2026-10-17 17:34:12.906417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7c9d4f816'
+down_revision: Union[str, Sequence[str], None] = 'd8e4a1f5c372'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows are rendered afterwards with `python -m app.render`.
+    op.add_column('posts', sa.Column('content_html', sa.Text(), nullable=True))
+    op.add_column('posts', sa.Column('word_count', sa.Integer(), nullable=True))
+    op.add_column('posts', sa.Column('first_image', sa.String(), nullable=True))
+    op.add_column('comments', sa.Column('content_html', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('comments', 'content_html')
+    op.drop_column('posts', 'first_image')
+    op.drop_column('posts', 'word_count')
+    op.drop_column('posts', 'content_html')
@@ -0,0 +1,32 @@
+"""posts user created_at index
+
+Revision ID: f3a8d6b1e925
+Revises: e2b7c9d4f816
+Create Date: 2026-10-17 19:05:47.231580
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a8d6b1e925'
+down_revision: Union[str, Sequence[str], None] = 'e2b7c9d4f816'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_posts_user_created_at_id',
+        'posts',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_posts_user_created_at_id', table_name='posts')
@@ -0,0 +1,253 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import time
+import traceback
+from typing import Callable, Iterable
+
+import orjson
+
+from app.settings import settings
+
+
+class TTLCache:
+    '''Bounded LRU cache whose entries also expire after `ttl` seconds.
+
+    `on_remove` is called with the key of every entry that leaves the cache,
+    whether it expired, was evicted or was deleted.
+    '''
+
+    def __init__(self, maxsize: int, ttl: float, on_remove: Callable[[str], None] | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_remove = on_remove
+        self._data: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self._removed(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value, ttl: float | None = None) -> None:
+        self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            evicted, _ = self._data.popitem(last=False)
+            self._removed(evicted)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        if self._data.pop(key, None) is not None:
+            self._removed(key)
+
+    def clear(self) -> None:
+        keys = list(self._data)
+        self._data.clear()
+        for key in keys:
+            self._removed(key)
+
+    def _removed(self, key: str) -> None:
+        if self.on_remove is not None:
+            self.on_remove(key)
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+
+# Tag sets outlive any entry they point to; stale members are harmless.
+TAG_TTL = 86400
+
+
+class CacheBackend(ABC):
+    '''Async byte cache with TTLs and tag-based invalidation.
+
+    Values are opaque bytes; callers encode them with orjson (see `pack`).
+    Tagging an entry lets one `invalidate_tags` call drop every entry that
+    depends on, for example, a given user. `shared` is true when every
+    worker sees the same entries, so an invalidation reaches them all.
+    '''
+
+    shared = False
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        ...
+
+    @abstractmethod
+    async def invalidate_tags(self, *tags: str) -> None:
+        ...
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryCache(CacheBackend):
+    '''Per-process backend; invalidations are only seen by this worker.'''
+
+    def __init__(self, maxsize: int):
+        self._entries = TTLCache(maxsize, ttl=60, on_remove=self._untag)
+        # Both directions are kept so an entry leaving the cache drops out of
+        # its tags, and the tag map never outgrows the cache itself.
+        self._tags: dict[str, set[str]] = {}
+        self._key_tags: dict[str, set[str]] = {}
+
+    def _untag(self, key: str) -> None:
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    async def get(self, key: str) -> bytes | None:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()) -> None:
+        self._untag(key)
+        self._entries.set(key, value, ttl)
+        tags = set(tags)
+        if tags:
+            self._key_tags[key] = tags
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.delete(key)
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        for tag in tags:
+            await self.delete(*self._tags.pop(tag, ()))
+
+    def stats(self) -> dict:
+        return {'backend': 'memory', **self._entries.stats(), 'tags': len(self._tags)}
+
+
+class RedisCache(CacheBackend):
+    '''Backend shared by every worker through any Redis-protocol server.
+
+    The cache fails open: when the server is unreachable, errors are logged
+    and reads behave as misses, so requests fall through to the database.
+    `client` takes an existing async Redis client, such as fakeredis in tests.
+    '''
+
+    shared = True
+
+    def __init__(self, url: str, prefix: str, client=None):
+        import redis.asyncio as redis
+
+        self._redis = client or redis.from_url(url)
+        self._prefix = prefix
+        self._errors = (redis.RedisError, OSError)
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _key(self, key: str) -> str:
+        return f'{self._prefix}{key}'
+
+    def _tag_key(self, tag: str) -> str:
+        return f'{self._prefix}tag:{tag}'
+
+    def _failed(self) -> None:
+        self.errors += 1
+        traceback.print_exc()
+
+    async def get(self, key: str) -> bytes | None:
+        try:
+            value = await self._redis.get(self._key(key))
+        except self._errors:
+            self._failed()
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()) -> None:
+        ttl = max(1, int(ttl))
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.set(self._key(key), value, ex=ttl)
+                for tag in tags:
+                    pipe.sadd(self._tag_key(tag), self._key(key))
+                    pipe.expire(self._tag_key(tag), TAG_TTL)
+                await pipe.execute()
+        except self._errors:
+            self._failed()
+
+    async def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+        try:
+            await self._redis.delete(*(self._key(key) for key in keys))
+        except self._errors:
+            self._failed()
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        try:
+            for tag in tags:
+                tag_key = self._tag_key(tag)
+                keys = await self._redis.smembers(tag_key)
+                await self._redis.delete(tag_key, *keys)
+        except self._errors:
+            self._failed()
+
+    def stats(self) -> dict:
+        return {'backend': 'redis', 'hits': self.hits, 'misses': self.misses, 'errors': self.errors}
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def create_cache(url: str) -> CacheBackend:
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisCache(url, settings.CACHE_PREFIX)
+    return MemoryCache(settings.CACHE_SIZE)
+
+
+def pack(meta: dict, body: bytes) -> bytes:
+    '''Store a small metadata header in front of an already encoded body.'''
+    return orjson.dumps(meta) + b'\n' + body
+
+
+def unpack(value: bytes) -> tuple[dict, bytes]:
+    meta, _, body = value.partition(b'\n')
+    return orjson.loads(meta), body
+
+
+cache = create_cache(settings.CACHE_URL)
@@ -0,0 +1,154 @@
+'''Live comment events, fanned out from one LISTEN connection per worker.
+
+Comment writes call `notify()` or `notify_many()` inside their transaction, so Postgres delivers
+the event only once the write commits. Each worker keeps a single asyncpg
+connection listening on `CHANNEL` and hands every event to the in-process
+subscribers of that post; clients never hold a database connection.
+'''
+import asyncio
+import re
+import traceback
+
+import asyncpg
+import orjson
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.database import AsyncSessionLocal
+from app.schemas.comment import CommentOut
+from app.settings import settings
+
+
+CHANNEL = 'comment_events'
+
+
+async def notify_many(db: AsyncConnection, events: list[tuple[str, str, str]]) -> None:
+    '''Queue `(event, post_id, comment_id)` events on the current transaction.'''
+    payloads = [
+        orjson.dumps({'event': event, 'post_id': post_id, 'comment_id': comment_id}).decode()
+        for event, post_id, comment_id in events
+    ]
+    await db.execute(
+        text('SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS TEXT[])) AS payload'),
+        {'channel': CHANNEL, 'payloads': payloads},
+    )
+
+
+async def notify(db: AsyncConnection, event: str, post_id: str, comment_id: str) -> None:
+    '''Queue a comment event on the current transaction.'''
+    await notify_many(db, [(event, post_id, comment_id)])
+
+
+class CommentBroker:
+    '''Listens for comment events and fans them out to per-post subscriber queues.'''
+
+    def __init__(self, dsn: str, queue_size: int, reconnect_delay: float = 1.0):
+        self.dsn = dsn
+        self.queue_size = queue_size
+        self.reconnect_delay = reconnect_delay
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+        self._events: asyncio.Queue[str] = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+
+    def subscribe(self, post_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(post_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, post_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(post_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[post_id]
+
+    @staticmethod
+    def _close(queue: asyncio.Queue) -> None:
+        '''Tell a subscriber to end its stream, making room for the marker if needed.'''
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def _on_notification(self, connection, pid, channel, payload: str) -> None:
+        self._events.put_nowait(payload)
+
+    async def _listen(self) -> None:
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                await connection.add_listener(CHANNEL, self._on_notification)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await closed.wait()
+            except asyncio.CancelledError:
+                if connection is not None:
+                    await connection.close()
+                raise
+            except Exception:
+                traceback.print_exc()
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _dispatch(self) -> None:
+        while True:
+            payload = orjson.loads(await self._events.get())
+            if payload['post_id'] not in self._subscribers:
+                continue
+            try:
+                message = await self._render(payload)
+            except Exception:
+                traceback.print_exc()
+                continue
+            for queue in list(self._subscribers.get(payload['post_id'], ())):
+                try:
+                    queue.put_nowait(message)
+                except asyncio.QueueFull:
+                    # A client too slow to keep up is dropped rather than
+                    # letting its backlog grow without bound.
+                    self.unsubscribe(payload['post_id'], queue)
+                    self._close(queue)
+
+    async def _render(self, payload: dict) -> bytes:
+        '''Build the SSE frame for an event, loading the comment once per worker.'''
+        data = {'comment_id': payload['comment_id'], 'post_id': payload['post_id']}
+        if payload['event'] != 'deleted':
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(text('''
+                    SELECT
+                        c.id AS comment_id, c.post_id, c.parent_id, c.depth, c.reply_count,
+                        c.content, c.content_html, c.created_at,
+                        u.name AS user_name, u.email AS user_email, u.image AS user_image
+                    FROM comments c
+                    JOIN users u ON c.user_id = u.id
+                    WHERE c.id = :comment_id
+                '''), {'comment_id': payload['comment_id']})
+                row = result.mappings().first()
+            if row is not None:
+                data = CommentOut.model_validate(dict(row)).model_dump()
+        return b'event: ' + payload['event'].encode() + b'\ndata: ' + orjson.dumps(data) + b'\n\n'
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._listen()), asyncio.create_task(self._dispatch())]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self._close(queue)
+        self._subscribers.clear()
+
+
+comment_broker = CommentBroker(
+    re.sub(r'^postgresql\+asyncpg:', 'postgresql:', settings.DB_URL),
+    settings.COMMENT_STREAM_QUEUE_SIZE,
+)
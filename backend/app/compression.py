@@ -0,0 +1,163 @@
+import gzip
+import zlib
+
+from fastapi import Request, Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.cache import TTLCache
+from app.conditional import body_etag
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+SUPPORTED_ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+EXCLUDED_CONTENT_TYPES = ('text/event-stream',)
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    '''Pick the best supported encoding from an Accept-Encoding header.'''
+    weights = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[coding.strip().lower()] = quality
+    candidates = [
+        (weights.get(coding, weights.get('*', 0.0)), -i, coding)
+        for i, coding in enumerate(SUPPORTED_ENCODINGS)
+    ]
+    quality, _, coding = max(candidates)
+    return coding if quality > 0 else None
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=9 if best else 4)
+    return gzip.compress(body, compresslevel=9 if best else 6)
+
+
+# Compressed variants of cached bodies, keyed by a hash of the body itself
+# (ETags may be derived from row metadata rather than content) and the
+# encoding, so a hot body is compressed once per worker rather than on every
+# request.
+_compressed_bodies = TTLCache(maxsize=256, ttl=3600)
+
+
+def encoded_response(
+    request: Request,
+    body: bytes,
+    headers: dict[str, str],
+    minimum_size: int,
+) -> Response:
+    '''Build a JSON response from a cached body, reusing its compressed variant.'''
+    headers = {**headers, 'Vary': 'Accept-Encoding'}
+    encoding = None
+    if len(body) >= minimum_size:
+        encoding = negotiate_encoding(request.headers.get('accept-encoding', ''))
+    if encoding:
+        key = f'{body_etag(body)}:{encoding}'
+        compressed = _compressed_bodies.get(key)
+        if compressed is None:
+            compressed = compress(body, encoding, best=True)
+            _compressed_bodies.set(key, compressed)
+        headers['Content-Encoding'] = encoding
+        body = compressed
+    return Response(content=body, media_type='application/json', headers=headers)
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=4)
+        else:
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes, more: bool) -> bytes:
+        if self.encoding == 'br':
+            out = self._compressor.process(data)
+            return out + (self._compressor.flush() if more else self._compressor.finish())
+        out = self._compressor.compress(data)
+        return out + self._compressor.flush(zlib.Z_SYNC_FLUSH if more else zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    '''Compress responses according to Accept-Encoding.
+
+    Responses that already carry a Content-Encoding (such as cached bodies
+    sent through `encoded_response`) and event streams are passed through.
+    '''
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get('accept-encoding', ''))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message | None = None
+        passthrough = False
+        compressor: _StreamCompressor | None = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, passthrough, compressor
+            if message['type'] == 'http.response.start':
+                headers = Headers(raw=message['headers'])
+                passthrough = (
+                    'content-encoding' in headers
+                    or headers.get('content-type', '').startswith(EXCLUDED_CONTENT_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start_message = message
+                return
+            if message['type'] != 'http.response.body' or passthrough:
+                await send(message)
+                return
+
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+            if start_message is not None:
+                headers = MutableHeaders(raw=start_message['headers'])
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                headers['Content-Encoding'] = encoding
+                headers.add_vary_header('Accept-Encoding')
+                if more_body:
+                    del headers['Content-Length']
+                    compressor = _StreamCompressor(encoding)
+                else:
+                    body = compress(body, encoding)
+                    headers['Content-Length'] = str(len(body))
+                    await send(start_message)
+                    await send({'type': 'http.response.body', 'body': body})
+                    return
+                await send(start_message)
+                start_message = None
+
+            await send({
+                'type': 'http.response.body',
+                'body': compressor.chunk(body, more_body),
+                'more_body': more_body,
+            })
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,63 @@
+from datetime import timezone
+from email.utils import formatdate, parsedate_to_datetime
+import hashlib
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    '''Build an entity tag from the values that determine a representation.'''
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def page_validators(rows, columns: tuple[str, ...], *parts) -> tuple[str, int | None]:
+    '''Build `(etag, last_modified)` from the rows a page actually returns.
+
+    Each row carries `last_modified`, the newest of its own and its author's
+    `updated_at`, so profile changes show up too; `columns` are the values
+    that identify a row's version.
+    '''
+    last_modified = max((row['last_modified'] for row in rows), default=None)
+    etag = make_etag(*parts, *(tuple(row[column] for column in columns) for row in rows))
+    return etag, last_modified
+
+
+def body_etag(body: bytes) -> str:
+    return f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+def validator_headers(etag: str, last_modified: int | None) -> dict[str, str]:
+    # The identity, gzip and br variants share one tag, so it is sent weak:
+    # they are equivalent but not byte-identical.
+    headers = {'ETag': f'W/{etag}'}
+    if last_modified:
+        headers['Last-Modified'] = formatdate(last_modified, usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: int | None) -> bool:
+    '''Evaluate If-None-Match / If-Modified-Since; If-None-Match wins when both are sent.'''
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        if if_none_match.strip() == '*':
+            return True
+        candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return etag in candidates
+
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified <= int(since.timestamp())
+    return False
+
+
+def not_modified(etag: str, last_modified: int | None) -> Response:
+    headers = validator_headers(etag, last_modified)
+    headers['Vary'] = 'Accept-Encoding'
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,73 @@
+'''Streaming NDJSON export of posts and comments.
+
+Rows are read through a server-side cursor and written one line at a time,
+so memory use does not depend on table size. Every line carries a `type` of
+`post` or `comment`; pass `since` to only export rows updated after it, and
+`user_id` to only export one user's rows. The full dump, drafts and deleted
+comments included, is only available from the command line:
+
+    python -m app.exporter --since 1750000000 > backup.ndjson
+'''
+import argparse
+import asyncio
+import sys
+from typing import AsyncIterator
+
+import orjson
+from sqlalchemy import text
+
+from app.database import AsyncSessionLocal
+
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_QUERIES = {
+    'post': '''
+        SELECT
+            id, user_id, title, slug, content, tags, views, is_published,
+            created_at, updated_at, deleted_at
+        FROM posts
+        WHERE updated_at > :since {owner}
+        ORDER BY updated_at, id
+    ''',
+    'comment': '''
+        SELECT
+            id, post_id, user_id, parent_id, path, depth, content, is_deleted,
+            created_at, updated_at, deleted_at
+        FROM comments
+        WHERE updated_at > :since {owner}
+        ORDER BY updated_at, id
+    ''',
+}
+
+
+async def export_ndjson(since: int = 0, user_id: str | None = None) -> AsyncIterator[bytes]:
+    '''Yield one NDJSON line per post, then one per comment, optionally only those owned by `user_id`.'''
+    owner = 'AND user_id = :user_id' if user_id else ''
+    async with AsyncSessionLocal() as db:
+        for row_type, query in EXPORT_QUERIES.items():
+            result = await db.stream(
+                text(query.format(owner=owner)).execution_options(yield_per=EXPORT_BATCH_SIZE),
+                {'since': since, 'user_id': user_id},
+            )
+            async for row in result.mappings():
+                yield orjson.dumps({'type': row_type, **row}, option=orjson.OPT_APPEND_NEWLINE)
+
+
+async def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m app.exporter', description='Export posts and comments as NDJSON.')
+    parser.add_argument('--since', type=int, default=0, help='only export rows with updated_at after this timestamp')
+    parser.add_argument('--output', help='file to write to, defaults to stdout')
+    args = parser.parse_args(argv)
+
+    out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    try:
+        async for line in export_ndjson(args.since):
+            out.write(line)
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,154 @@
+import asyncio
+import time
+import traceback
+import uuid
+
+import orjson
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.cache import cache, pack, unpack
+from app.conditional import body_etag
+from app.database import AsyncSessionLocal
+from app.pagination import encode_cursor
+from app.schemas.post import PostPage
+from app.settings import settings
+
+
+FEED_CACHE_KEY = 'feed:home'
+FEED_GENERATION_KEY = 'feed:home:generation'
+GENERATION_TTL = 86400
+
+
+async def fetch_post_page(
+    db: AsyncConnection,
+    limit: int,
+    cursor: list | None = None,
+    tags: list[str] | None = None,
+    match: str = 'all',
+    user_id: str | None = None,
+    published_only: bool = True,
+) -> dict:
+    '''Select one page of post summaries, newest first.'''
+    params = {'limit': limit + 1}
+    filters = ['posts.is_published = true'] if published_only else []
+    if user_id:
+        params['user_id'] = user_id
+        filters.append('posts.user_id = :user_id')
+    if tags:
+        params['tags'] = tags
+        operator = '@>' if match == 'all' else '&&'
+        filters.append(f'posts.tags {operator} CAST(:tags AS VARCHAR[])')
+    if cursor:
+        params['cursor_created_at'], params['cursor_id'] = cursor
+        filters.append('(posts.created_at, posts.id) < (:cursor_created_at, :cursor_id)')
+    where = ' AND '.join(filters) or 'true'
+
+    query = text(f'''
+        SELECT
+            posts.id, posts.slug, posts.title, posts.tags, posts.excerpt, posts.reading_time,
+            posts.comment_count, posts.is_published, posts.created_at,
+            users.name AS user_name, users.email AS user_email, users.image AS user_image,
+            GREATEST(posts.updated_at, users.updated_at) AS last_modified
+        FROM posts
+        JOIN users ON posts.user_id = users.id
+        WHERE {where}
+        ORDER BY posts.created_at DESC, posts.id DESC
+        LIMIT :limit
+    ''')
+    result = await db.execute(query, params)
+    posts = result.mappings().all()
+
+    next_cursor = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        next_cursor = encode_cursor(posts[-1]['created_at'], posts[-1]['id'])
+    return {'items': posts, 'next_cursor': next_cursor}
+
+
+class FeedSnapshot:
+    '''First page of the feed, pre-encoded and shared through the cache.
+
+    Writers call `invalidate()`, which drops the shared entry and schedules a
+    rebuild. Until a worker has rebuilt it, readers keep getting that worker's
+    last snapshot, so the database only ever sees the rebuild queries. Each
+    invalidation also bumps a shared generation; a build that saw an older
+    generation is not stored, so a rebuild racing a write cannot put a stale
+    snapshot back for a whole TTL.
+    '''
+
+    def __init__(self, limit: int, max_age: float):
+        self.limit = limit
+        self.max_age = max_age
+        self.snapshot: tuple[bytes, str, int] | None = None
+        self._dirty = False
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    async def get(self) -> tuple[bytes, str, int]:
+        '''Return `(body, etag, last_modified)`, building it only on a cold start.'''
+        value = await cache.get(FEED_CACHE_KEY)
+        if value is not None:
+            meta, body = unpack(value)
+            self.snapshot = (body, meta['etag'], meta['last_modified'])
+        elif self.snapshot is None:
+            async with self._lock:
+                if self.snapshot is None:
+                    await self._build()
+        elif self._task is None or self._task.done():
+            self.refresh()
+        return self.snapshot
+
+    async def invalidate(self) -> None:
+        await cache.set(FEED_GENERATION_KEY, uuid.uuid4().hex.encode(), ttl=GENERATION_TTL)
+        await cache.delete(FEED_CACHE_KEY)
+        self.refresh()
+
+    def refresh(self) -> None:
+        '''Schedule a background rebuild.'''
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._rebuild())
+
+    async def _rebuild(self) -> None:
+        # Writes landing mid-build set _dirty again, so one more pass follows.
+        while self._dirty:
+            self._dirty = False
+            try:
+                async with self._lock:
+                    await self._build()
+            except Exception:
+                traceback.print_exc()
+                return
+
+    async def _build(self) -> None:
+        generation = await cache.get(FEED_GENERATION_KEY)
+        async with AsyncSessionLocal() as db:
+            page = await fetch_post_page(db, self.limit)
+        body = orjson.dumps(PostPage.model_validate({
+            'items': [dict(post) for post in page['items']],
+            'next_cursor': page['next_cursor'],
+        }).model_dump())
+        etag, last_modified = body_etag(body), int(time.time())
+        self.snapshot = (body, etag, last_modified)
+        if await cache.get(FEED_GENERATION_KEY) != generation:
+            # Invalidated while building: keep this copy locally only and
+            # build again from the newer data.
+            self.refresh()
+            return
+        await cache.set(
+            FEED_CACHE_KEY,
+            pack({'etag': etag, 'last_modified': last_modified}, body),
+            ttl=self.max_age,
+        )
+
+    async def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+home_feed = FeedSnapshot(settings.FEED_SIZE, settings.FEED_MAX_AGE)
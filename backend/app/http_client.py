@@ -0,0 +1,86 @@
+'''Shared outbound HTTP client.
+
+One pooled `httpx.AsyncClient` per worker, opened and closed by the app
+lifespan, so outbound calls reuse keep-alive connections and never block the
+event loop. Pass `transport=httpx.MockTransport(handler)` to exercise callers
+without the network.
+'''
+import asyncio
+
+import httpx
+
+from app.settings import settings
+
+
+RETRY_STATUSES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+
+class HttpClient:
+    '''Async HTTP client with timeouts and retries with exponential backoff.'''
+
+    def __init__(
+        self,
+        timeout: float,
+        max_connections: int,
+        retries: int,
+        backoff: float,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.retries = retries
+        self.backoff = backoff
+        self.transport = transport
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self.start()
+        return self._client
+
+    def start(self) -> None:
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(self.timeout),
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            transport=self.transport,
+        )
+
+    async def request(self, method: str, url: str, retry: bool | None = None, **kwargs) -> httpx.Response:
+        '''Send a request, retrying connection errors, timeouts and transient statuses.
+
+        Only idempotent methods are retried unless `retry=True` says the call
+        is safe to replay; a POST is otherwise sent exactly once.
+        '''
+        if retry is None:
+            retry = method.upper() in IDEMPOTENT_METHODS
+        retries = self.retries if retry else 0
+        for attempt in range(retries + 1):
+            last_attempt = attempt == retries
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if last_attempt:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or last_attempt:
+                    return response
+                await response.aclose()
+            await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('GET', url, **kwargs)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+http_client = HttpClient(
+    settings.HTTP_TIMEOUT,
+    settings.HTTP_MAX_CONNECTIONS,
+    settings.HTTP_RETRIES,
+    settings.HTTP_BACKOFF,
+)
@@ -0,0 +1,188 @@
+'''Bulk post import from NDJSON using COPY.
+
+Each input line is a JSON object with `title`, `content` and optional `tags`,
+`created_at`, `updated_at` and `is_published`. Rows are loaded in batches of
+`batch_size`; every batch is its own transaction, so `ImportResult.last_line`
+is a safe checkpoint to resume from after a failure.
+
+    python -m app.importer posts.ndjson --author-email me@example.com --checkpoint posts.ckpt
+'''
+import argparse
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime as dt
+import os
+import sys
+from typing import AsyncIterator, Callable
+import uuid
+
+import orjson
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.database import AsyncSessionLocal
+from app.schemas.post import PostCreateUpdate
+from app.render import render_content
+from app.settings import settings
+from app.utils import allocate_slugs, normalize_tags, slugify
+
+
+COPY_COLUMNS = [
+    'id', 'user_id', 'title', 'slug', 'content', 'content_html', 'excerpt', 'word_count',
+    'reading_time', 'first_image', 'tags', 'views', 'is_published', 'created_at', 'updated_at',
+]
+MAX_REPORTED_ERRORS = 100
+
+
+class PostImportRecord(PostCreateUpdate):
+    created_at: int | None = None
+    updated_at: int | None = None
+    is_published: bool = True
+
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    last_line: int = 0
+    errors: list[dict] = field(default_factory=list)
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    '''Split a byte stream into lines without holding more than one chunk.'''
+    buffer = b''
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+async def _reserve_slugs(db: AsyncConnection, base_slugs: list[str]) -> list[str]:
+    '''Reserve one slug per entry, skipping any that already exist in posts.'''
+    slugs = [None] * len(base_slugs)
+    pending = list(range(len(base_slugs)))
+    while pending:
+        allocated = await allocate_slugs(db, Counter(base_slugs[i] for i in pending))
+        for i in pending:
+            slugs[i] = allocated[base_slugs[i]].pop()
+        result = await db.execute(
+            text('SELECT slug FROM posts WHERE slug = ANY(CAST(:slugs AS VARCHAR[]))'),
+            {'slugs': [slugs[i] for i in pending]},
+        )
+        taken = set(result.scalars().all())
+        pending = [i for i in pending if slugs[i] in taken]
+    return slugs
+
+
+async def _copy_batch(db: AsyncConnection, user_id: str, batch: list[PostImportRecord]) -> None:
+    slugs = await _reserve_slugs(db, [slugify(record.title) for record in batch])
+    now = int(dt.now().timestamp())
+    rows = []
+    tag_counts = Counter()
+    for record, slug in zip(batch, slugs):
+        tags = normalize_tags(record.tags)
+        if record.is_published:
+            # Drafts are left out of tag_counts until they are published.
+            tag_counts.update(tags or [])
+        created_at = record.created_at or now
+        rendered = render_content(record.content)
+        rows.append((
+            str(uuid.uuid4()), user_id, record.title, slug, orjson.dumps(record.content).decode(),
+            rendered.html, rendered.excerpt, rendered.word_count, rendered.reading_time,
+            rendered.first_image, tags, 0, record.is_published, created_at, record.updated_at or created_at,
+        ))
+
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table('posts', records=rows, columns=COPY_COLUMNS)
+
+    if tag_counts:
+        tags = sorted(tag_counts)
+        await db.execute(text('''
+            INSERT INTO tag_counts (tag, post_count)
+            SELECT tag, n FROM unnest(CAST(:tags AS VARCHAR[]), CAST(:counts AS INTEGER[])) AS t(tag, n)
+            ON CONFLICT (tag) DO UPDATE SET post_count = tag_counts.post_count + EXCLUDED.post_count
+        '''), {'tags': tags, 'counts': [tag_counts[tag] for tag in tags]})
+    await db.commit()
+
+
+async def import_posts(
+    db: AsyncConnection,
+    lines: AsyncIterator[bytes | str],
+    user_id: str,
+    batch_size: int = settings.IMPORT_BATCH_SIZE,
+    start_line: int = 0,
+    on_progress: Callable[[ImportResult], None] | None = None,
+) -> ImportResult:
+    '''Load NDJSON posts owned by `user_id`, skipping the first `start_line` lines.'''
+    result = ImportResult(last_line=start_line)
+    batch: list[PostImportRecord] = []
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if line_number <= start_line or not line.strip():
+            continue
+        try:
+            batch.append(PostImportRecord.model_validate(orjson.loads(line)))
+        except (orjson.JSONDecodeError, ValidationError) as e:
+            if len(result.errors) < MAX_REPORTED_ERRORS:
+                result.errors.append({'line': line_number, 'error': str(e)})
+        if len(batch) >= batch_size:
+            await _copy_batch(db, user_id, batch)
+            result.imported += len(batch)
+            result.last_line = line_number
+            batch = []
+            if on_progress:
+                on_progress(result)
+
+    if batch:
+        await _copy_batch(db, user_id, batch)
+        result.imported += len(batch)
+    result.last_line = max(line_number, start_line)
+    if on_progress:
+        on_progress(result)
+    return result
+
+
+async def _file_lines(path: str) -> AsyncIterator[bytes]:
+    with open(path, 'rb') as f:
+        for line in f:
+            yield line
+
+
+async def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m app.importer', description='Bulk import posts from NDJSON.')
+    parser.add_argument('path', help='NDJSON file, one post per line')
+    parser.add_argument('--author-email', required=True, help='email of the user who will own the posts')
+    parser.add_argument('--batch-size', type=int, default=settings.IMPORT_BATCH_SIZE)
+    parser.add_argument('--checkpoint', help='file recording the last committed line, read on start to resume')
+    args = parser.parse_args(argv)
+
+    start_line = 0
+    if args.checkpoint and os.path.exists(args.checkpoint):
+        with open(args.checkpoint) as f:
+            start_line = int(f.read().strip() or 0)
+
+    def report(result: ImportResult) -> None:
+        print(f'imported {result.imported} posts, committed through line {result.last_line}', file=sys.stderr)
+        if args.checkpoint:
+            with open(args.checkpoint, 'w') as f:
+                f.write(str(result.last_line))
+
+    async with AsyncSessionLocal() as db:
+        user = await db.execute(text('SELECT id FROM users WHERE email = :email'), {'email': args.author_email})
+        user_id = user.scalar_one_or_none()
+        if not user_id:
+            sys.exit(f'No user with email {args.author_email}')
+        result = await import_posts(db, _file_lines(args.path), user_id, args.batch_size, start_line, report)
+
+    for error in result.errors:
+        print(f"line {error['line']}: {error['error']}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
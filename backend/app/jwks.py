@@ -0,0 +1,85 @@
+'''Google's JSON Web Key Set, cached for ID-token verification.
+
+The key set is fetched through the shared HTTP client, kept for as long as
+the response's Cache-Control max-age allows and refreshed in the background
+shortly before it expires, so logins never wait on Google for keys. A token
+signed with a key we have not seen yet forces one early refresh, at most
+every `min_refresh` seconds. `load()` seeds the cache directly, which lets
+tests and local setups use a stub key set without the network.
+'''
+import asyncio
+import re
+import time
+import traceback
+
+from app.http_client import HttpClient, http_client
+from app.settings import settings
+
+
+GOOGLE_ISSUERS = ('https://accounts.google.com', 'accounts.google.com')
+MAX_AGE = re.compile(r'max-age=(\d+)')
+
+
+class JWKSCache:
+    '''In-process copy of a JSON Web Key Set, refreshed before it goes stale.'''
+
+    def __init__(self, url: str, client: HttpClient, default_max_age: float, min_refresh: float):
+        self.url = url
+        self.client = client
+        self.default_max_age = default_max_age
+        self.min_refresh = min_refresh
+        self.jwks: dict = {'keys': []}
+        self.expires_at = 0.0
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    def load(self, jwks: dict, max_age: float | None = None) -> None:
+        self.jwks = jwks
+        self.expires_at = time.monotonic() + (max_age or self.default_max_age)
+
+    async def refresh(self) -> None:
+        async with self._lock:
+            self._fetched_at = time.monotonic()
+            response = await self.client.get(self.url)
+            response.raise_for_status()
+            match = MAX_AGE.search(response.headers.get('cache-control', ''))
+            self.load(response.json(), int(match.group(1)) if match else None)
+
+    async def key_set(self, force: bool = False) -> dict:
+        '''Return the key set, fetching it on a cold cache or when `force` asks for unseen keys.'''
+        if not self.jwks.get('keys') or (force and time.monotonic() - self._fetched_at >= self.min_refresh):
+            await self.refresh()
+        return self.jwks
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+                # Refresh a little before expiry so readers never see a stale set.
+                delay = max(self.min_refresh, (self.expires_at - time.monotonic()) * 0.9)
+            except Exception:
+                traceback.print_exc()
+                delay = self.min_refresh
+            await asyncio.sleep(delay)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+google_jwks = JWKSCache(
+    settings.GOOGLE_JWKS_URL,
+    http_client,
+    settings.JWKS_DEFAULT_MAX_AGE,
+    settings.JWKS_MIN_REFRESH,
+)
+
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
@@ -5,15 +7,50 @@ from fastapi.responses import ORJSONResponse
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache import cache
+from app.comment_events import comment_broker
+from app.comment_writer import comment_writer
+from app.compression import CompressionMiddleware
 from app.database import get_db
-from app.routers import posts, auth, comments
+from app.feed import home_feed
+from app.http_client import http_client
+from app.jwks import google_jwks
+from app.purge import comment_purge_job, session_reaper
+from app.routers import posts, auth, comments, tags, export, users
 from app.settings import settings
+from app.view_counter import view_counter
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    http_client.start()
+    google_jwks.start()
+    view_counter.start()
+    home_feed.refresh()
+    comment_purge_job.start()
+    session_reaper.start()
+    comment_broker.start()
+    if settings.COMMENT_GROUP_COMMIT:
+        comment_writer.start()
+    yield
+    await comment_writer.stop()
+    await comment_broker.stop()
+    await session_reaper.stop()
+    await comment_purge_job.stop()
+    await home_feed.stop()
+    await view_counter.stop()
+    await cache.close()
+    await google_jwks.stop()
+    await http_client.close()
 
 
-app = FastAPI(root_path='/api', default_response_class=ORJSONResponse)
+app = FastAPI(root_path='/api', default_response_class=ORJSONResponse, lifespan=lifespan)
 app.include_router(posts.router)
 app.include_router(auth.router)
 app.include_router(comments.router)
+app.include_router(tags.router)
+app.include_router(export.router)
+app.include_router(users.router)
 
 
 ORIGINS = ['*']
@@ -26,11 +63,17 @@ app.add_middleware(
 )
 
 app.add_middleware(SessionMiddleware, secret_key=settings.SECRET_KEY)
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
 
 
 @app.get('/')
 async def heatlh(db: AsyncSession = Depends(get_db)):
-    response = {'app': 'working', 'db': None}
+    response = {
+        'app': 'working',
+        'db': None,
+        'cache': cache.stats(),
+        'comment_streams': comment_broker.subscriber_count(),
+    }
     try:
         result = await db.execute(text('SELECT "working"'))
         response['db'] = result.scalar()
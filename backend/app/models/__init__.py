@@ -1,4 +1,6 @@
 from app.models.user import User
 from app.models.post import Post
 from app.models.session import Session
-from app.models.comment import Comment
\ No newline at end of file
+from app.models.comment import Comment
+from app.models.tag import TagCount
+from app.models.slug_counter import SlugCounter
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import ARRAY, JSON, Boolean, Column, Integer, String, ForeignKey
+from sqlalchemy import ARRAY, JSON, Boolean, Column, Index, Integer, String, Text, ForeignKey, text
 from sqlalchemy.orm import relationship
 from app.models.base import Base
 
@@ -9,7 +9,14 @@ class Comment(Base):
     id = Column(String, primary_key=True)
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
     post_id = Column(String, ForeignKey("posts.id"), nullable=False)
+    parent_id = Column(String, ForeignKey("comments.id"), nullable=True)
+    # Root-to-self chain of segments (see app.utils.comment_path); "C"
+    # collation keeps byte order so a subtree is one index range.
+    path = Column(String(collation='C'), nullable=False)
+    depth = Column(Integer, nullable=False, default=0, server_default='0')
+    reply_count = Column(Integer, nullable=False, default=0, server_default='0')
     content = Column(JSON, nullable=False)
+    content_html = Column(Text, nullable=True)
     created_at = Column(Integer, nullable=False)
     updated_at = Column(Integer, nullable=False)
     is_deleted = Column(Boolean, default=False)
@@ -18,5 +25,18 @@ class Comment(Base):
     user = relationship("User", back_populates="comments")
     post = relationship("Post", back_populates="comments")
 
+    __table_args__ = (
+        Index('ix_comments_updated_at_id', updated_at, id),
+        Index(
+            'ix_comments_live_post_created_at', post_id, created_at, id,
+            postgresql_where=text('is_deleted = false'),
+        ),
+        Index('ix_comments_deleted_at', deleted_at, postgresql_where=text('is_deleted = true')),
+        Index('ix_comments_parent_id', parent_id, postgresql_where=text('parent_id IS NOT NULL')),
+        # Threads include tombstones, so the path indexes cover every row.
+        Index('ix_comments_post_path', post_id, path),
+        Index('ix_comments_post_root_path', post_id, path, postgresql_where=text('parent_id IS NULL')),
+    )
+
     def __repr__(self):
         return f'<Comment(id={self.id}, user_id={self.user_id}, post_id={self.post_id})>'
\ No newline at end of file
@@ -1,8 +1,16 @@
-from sqlalchemy import ARRAY, JSON, Boolean, Column, Integer, String, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import ARRAY, JSON, Boolean, Column, Computed, Index, Integer, String, Text, ForeignKey, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from app.models.base import Base
 
 
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', posts_tags_text(tags)), 'B') || "
+    "setweight(to_tsvector('english', coalesce(content #>> '{}', '')), 'C')"
+)
+
+
 class Post(Base):
     __tablename__ = 'posts'
 
@@ -11,15 +19,33 @@ class Post(Base):
     title = Column(String, nullable=False)
     slug = Column(String, unique=True, nullable=False)
     content = Column(JSON, nullable=False)
+    content_html = Column(Text, nullable=True)
+    excerpt = Column(String, nullable=True)
+    word_count = Column(Integer, nullable=True)
+    reading_time = Column(Integer, nullable=True)
+    first_image = Column(String, nullable=True)
     tags = Column(ARRAY(String))
     views = Column(Integer, default=0)
+    comment_count = Column(Integer, nullable=False, default=0, server_default='0')
     is_published = Column(Boolean, default=True)
     created_at = Column(Integer, nullable=False)
     updated_at = Column(Integer, nullable=False)
     deleted_at = Column(Integer, nullable=True)
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_EXPRESSION, persisted=True)))
 
     user = relationship("User", back_populates="posts")
     comments = relationship("Comment", back_populates="post")
 
+    __table_args__ = (
+        Index(
+            'ix_posts_live_created_at_id', created_at.desc(), id.desc(),
+            postgresql_where=text('is_published = true'),
+        ),
+        Index('ix_posts_search_vector', search_vector, postgresql_using='gin'),
+        Index('ix_posts_tags', tags, postgresql_using='gin'),
+        Index('ix_posts_updated_at_id', updated_at, id),
+        Index('ix_posts_user_created_at_id', user_id, created_at.desc(), id.desc()),
+    )
+
     def __repr__(self):
         return f'<Post(id={self.id}, title={self.title}, slug={self.slug})>'
\ No newline at end of file
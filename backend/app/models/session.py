@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, Integer
+from sqlalchemy import Column, Index, String, ForeignKey, Integer
 from sqlalchemy.orm import relationship
 from app.models.base import Base
 
@@ -13,5 +13,9 @@ class Session(Base):
 
     user = relationship('User', back_populates='sessions')
 
+    __table_args__ = (
+        Index('ix_sessions_expires', expires),
+    )
+
     def __repr__(self):
         return f'<Session(id={self.id}, user_id={self.user_id}, expires={self.expires})>'
\ No newline at end of file
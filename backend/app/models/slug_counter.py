@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String
+from app.models.base import Base
+
+
+class SlugCounter(Base):
+    __tablename__ = 'slug_counters'
+
+    base_slug = Column(String, primary_key=True)
+    counter = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<SlugCounter(base_slug={self.base_slug}, counter={self.counter})>'
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String
+from app.models.base import Base
+
+
+class TagCount(Base):
+    __tablename__ = 'tag_counts'
+
+    tag = Column(String, primary_key=True)
+    post_count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TagCount(tag={self.tag}, post_count={self.post_count})>'
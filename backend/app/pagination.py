@@ -0,0 +1,26 @@
+import base64
+import binascii
+
+import orjson
+from fastapi import HTTPException
+
+
+def encode_cursor(*values) -> str:
+    '''Encode the sort key of the last row of a page into an opaque cursor.'''
+    return base64.urlsafe_b64encode(orjson.dumps(list(values))).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, *types: type) -> list:
+    '''Decode a cursor produced by `encode_cursor`, checking each value against `types`.'''
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = orjson.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail='Invalid cursor')
+    if (
+        not isinstance(values, list)
+        or len(values) != len(types)
+        or not all(isinstance(v, t) and not isinstance(v, bool) for v, t in zip(values, types))
+    ):
+        raise HTTPException(status_code=400, detail='Invalid cursor')
+    return values
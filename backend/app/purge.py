@@ -0,0 +1,130 @@
+'''Background jobs that hard-delete comments soft-deleted long enough ago and
+expired sessions.
+
+Rows go in small batches with a pause between them, so the jobs never hold
+many locks or saturate I/O. They run periodically from the app lifespan and
+can also be run once by hand:
+
+    python -m app.purge
+'''
+from abc import ABC, abstractmethod
+import asyncio
+from datetime import datetime as dt, timedelta
+import traceback
+
+from sqlalchemy import text
+
+from app.database import AsyncSessionLocal
+from app.settings import settings
+
+
+class PurgeJob(ABC):
+    '''Periodically deletes rows matched by `query` in batches of `batch_size`.'''
+
+    def __init__(self, batch_size: int, pause: float, interval: float):
+        self.batch_size = batch_size
+        self.pause = pause
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    @property
+    @abstractmethod
+    def query(self) -> str:
+        '''DELETE statement taking `:cutoff` and `:limit`.'''
+
+    @abstractmethod
+    def cutoff(self) -> int:
+        ...
+
+    async def purge(self) -> int:
+        query = text(self.query)
+        cutoff = self.cutoff()
+        total = 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(query, {'cutoff': cutoff, 'limit': self.batch_size})
+                await db.commit()
+            total += result.rowcount
+            if result.rowcount < self.batch_size:
+                return total
+            await asyncio.sleep(self.pause)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.purge()
+            except Exception:
+                traceback.print_exc()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class CommentPurgeJob(PurgeJob):
+    '''Removes comments soft-deleted more than `retention_days` ago.'''
+
+    query = '''
+        DELETE FROM comments
+        WHERE id IN (
+            SELECT id FROM comments
+            WHERE is_deleted = true AND deleted_at < :cutoff
+                -- Tombstones still anchor live replies until those go too.
+                AND NOT EXISTS (SELECT 1 FROM comments r WHERE r.parent_id = comments.id)
+            ORDER BY deleted_at
+            LIMIT :limit
+            FOR UPDATE SKIP LOCKED
+        )
+    '''
+
+    def __init__(self, retention_days: int, batch_size: int, pause: float, interval: float):
+        super().__init__(batch_size, pause, interval)
+        self.retention_days = retention_days
+
+    def cutoff(self) -> int:
+        return int((dt.now() - timedelta(days=self.retention_days)).timestamp())
+
+
+class SessionReaper(PurgeJob):
+    '''Removes sessions whose token has expired.'''
+
+    query = '''
+        DELETE FROM sessions
+        WHERE id IN (
+            SELECT id FROM sessions
+            WHERE expires < :cutoff
+            ORDER BY expires
+            LIMIT :limit
+            FOR UPDATE SKIP LOCKED
+        )
+    '''
+
+    def cutoff(self) -> int:
+        return int(dt.now().timestamp())
+
+
+comment_purge_job = CommentPurgeJob(
+    settings.COMMENT_PURGE_AFTER_DAYS,
+    settings.PURGE_BATCH_SIZE,
+    settings.PURGE_PAUSE,
+    settings.PURGE_INTERVAL,
+)
+session_reaper = SessionReaper(settings.PURGE_BATCH_SIZE, settings.PURGE_PAUSE, settings.PURGE_INTERVAL)
+
+
+async def main() -> None:
+    print(f'purged {await comment_purge_job.purge()} comments')
+    print(f'purged {await session_reaper.purge()} expired sessions')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,180 @@
+'''Write-time rendering of post and comment content.
+
+Content is Markdown; it is rendered once when written and the sanitized HTML
+and derived fields are stored next to it. Rows written before rendering or
+one of the derived fields was introduced can be filled in with:
+
+    python -m app.render --batch-size 500
+'''
+import argparse
+import asyncio
+from dataclasses import dataclass
+from html import escape
+from html.parser import HTMLParser
+import re
+
+import markdown
+from sqlalchemy import text
+
+from app.database import AsyncSessionLocal
+
+
+EXCERPT_LENGTH = 200
+WORDS_PER_MINUTE = 200
+
+ALLOWED_TAGS = {
+    'a', 'b', 'blockquote', 'br', 'code', 'del', 'em', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'hr', 'i', 'img', 'li', 'ol', 'p', 'pre', 's', 'strong', 'table', 'tbody', 'td', 'th',
+    'thead', 'tr', 'u', 'ul',
+}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'img': {'src', 'alt', 'title'},
+    'td': {'align'},
+    'th': {'align'},
+}
+VOID_TAGS = {'br', 'hr', 'img'}
+DROPPED_CONTENT_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'template'}
+SAFE_URL = re.compile(r'^(https?:|mailto:|/|#|\.|[^:]*$)', re.IGNORECASE)
+
+
+@dataclass
+class RenderedContent:
+    html: str
+    excerpt: str
+    word_count: int
+    reading_time: int
+    first_image: str | None
+
+
+class _Sanitizer(HTMLParser):
+    '''Rebuilds HTML keeping only allowlisted tags and attributes.'''
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.html: list[str] = []
+        self.text: list[str] = []
+        self.first_image: str | None = None
+        self._open: list[str] = []
+        self._dropping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_CONTENT_TAGS:
+            self._dropping += 1
+            return
+        if self._dropping or tag not in ALLOWED_TAGS:
+            return
+        kept = []
+        for name, value in attrs:
+            if name not in ALLOWED_ATTRIBUTES.get(tag, ()) or value is None:
+                continue
+            if name in ('href', 'src') and not SAFE_URL.match(value.strip()):
+                continue
+            kept.append(f' {name}="{escape(value)}"')
+            if name == 'src' and self.first_image is None:
+                self.first_image = value
+        if tag == 'a':
+            kept.append(' rel="nofollow noopener"')
+        self.html.append(f'<{tag}{"".join(kept)}>')
+        if tag not in VOID_TAGS:
+            self._open.append(tag)
+        else:
+            self.text.append(' ')
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in DROPPED_CONTENT_TAGS:
+            self._dropping -= 1
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_CONTENT_TAGS:
+            self._dropping = max(0, self._dropping - 1)
+            return
+        if self._dropping or tag not in self._open:
+            return
+        while self._open:
+            current = self._open.pop()
+            self.html.append(f'</{current}>')
+            if current == tag:
+                break
+        self.text.append(' ')
+
+    def handle_data(self, data):
+        if self._dropping:
+            return
+        self.html.append(escape(data, quote=False))
+        self.text.append(data)
+
+    def close(self):
+        super().close()
+        while self._open:
+            self.html.append(f'</{self._open.pop()}>')
+
+
+def render_content(content: str) -> RenderedContent:
+    sanitizer = _Sanitizer()
+    sanitizer.feed(markdown.markdown(content, extensions=['fenced_code', 'tables']))
+    sanitizer.close()
+
+    plain = re.sub(r'\s+', ' ', ''.join(sanitizer.text)).strip()
+    word_count = len(plain.split())
+    excerpt = plain
+    if len(plain) > EXCERPT_LENGTH:
+        excerpt = plain[:EXCERPT_LENGTH].rsplit(' ', 1)[0].rstrip('.,;:') + '…'
+    return RenderedContent(
+        html=''.join(sanitizer.html),
+        excerpt=excerpt,
+        word_count=word_count,
+        reading_time=max(1, -(-word_count // WORDS_PER_MINUTE)),
+        first_image=sanitizer.first_image,
+    )
+
+
+async def _backfill_table(table: str, batch_size: int, all_rows: bool) -> int:
+    missing = 'content_html IS NULL OR excerpt IS NULL' if table == 'posts' else 'content_html IS NULL'
+    where = '' if all_rows else f'AND ({missing})'
+    last_id = ''
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(text(f'''
+                SELECT id, content FROM {table}
+                WHERE id > :last_id {where}
+                ORDER BY id
+                LIMIT :limit
+            '''), {'last_id': last_id, 'limit': batch_size})
+            rows = result.all()
+            if not rows:
+                return total
+
+            rendered = [(row.id, render_content(row.content)) for row in rows]
+            if table == 'posts':
+                await db.execute(text('''
+                    UPDATE posts
+                    SET content_html = :html, excerpt = :excerpt, word_count = :word_count,
+                        reading_time = :reading_time, first_image = :first_image
+                    WHERE id = :id
+                '''), [{'id': row_id, **vars(render)} for row_id, render in rendered])
+            else:
+                await db.execute(
+                    text('UPDATE comments SET content_html = :html WHERE id = :id'),
+                    [{'id': row_id, 'html': render.html} for row_id, render in rendered],
+                )
+            await db.commit()
+        last_id = rows[-1].id
+        total += len(rows)
+        print(f'{table}: rendered {total} rows')
+
+
+async def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m app.render', description='Render stored post and comment content.')
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--all', action='store_true', help='re-render rows that already have HTML')
+    args = parser.parse_args(argv)
+
+    for table in ('posts', 'comments'):
+        await _backfill_table(table, args.batch_size, args.all)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
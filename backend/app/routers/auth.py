@@ -4,22 +4,32 @@ import uuid
 
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import RedirectResponse
-from authlib.integrations.starlette_client import OAuth
+from authlib.integrations.starlette_client import OAuth, StarletteOAuth2App
 from starlette.middleware.sessions import SessionMiddleware
-import requests
 from sqlalchemy.ext.asyncio import AsyncConnection
 from sqlalchemy import text
 from jose import JWTError, jwt
 
 
 from app.settings import settings
-from app.utils import create_access_token, log_token, log_user
+from app.jwks import GOOGLE_ISSUERS, google_jwks
+from app.utils import create_access_token, log_token, log_user, revoke_session
 from app.database import get_db
 
 
 router = APIRouter(prefix='', tags=['auth'])
 
 
+class GoogleOAuthApp(StarletteOAuth2App):
+    '''Google client whose ID-token checks read keys from the shared JWKS cache.'''
+
+    async def fetch_jwk_set(self, force=False):
+        return await google_jwks.key_set(force)
+
+
+ID_TOKEN_CLAIMS = {'iss': {'essential': True, 'values': list(GOOGLE_ISSUERS)}}
+
+
 oauth = OAuth()
 oauth.register(
     name='google_auth',
@@ -32,8 +42,8 @@ oauth.register(
     refresh_token_url=None,
     authorize_state=settings.SECRET_KEY,
     redirect_uri='http://127.0.0.1:8000/auth',
-    jwks_uri='https://www.googleapis.com/oauth2/v3/certs',
-    client_kwargs={'scope': 'openid profile email'},
+    client_cls=GoogleOAuthApp,
+    client_kwargs={'scope': 'openid profile email', 'timeout': settings.HTTP_TIMEOUT},
 )
 
 
@@ -48,32 +58,35 @@ async def login(request: Request):
     return await oauth.google_auth.authorize_redirect(request, redirect_url, prompt='consent')
 
 
+async def fetch_google_token(request: Request) -> dict:
+    '''Exchange the callback's code for tokens and verify the ID token.
+
+    Authlib checks the signature against `google_jwks`, plus the nonce,
+    audience, issuer and expiry, and puts the claims in `token['userinfo']`.
+    '''
+    return await oauth.google_auth.authorize_access_token(request, claims_options=ID_TOKEN_CLAIMS)
+
+
 @router.get('/auth')
 async def auth(request: Request, db: AsyncConnection = Depends(get_db)):
+    # The profile scope puts name and picture in the ID token, so verifying
+    # it locally replaces a round trip to the userinfo endpoint.
     try:
-        token = await oauth.google_auth.authorize_access_token(request)
-    except Exception as e:
-        raise HTTPException(status_code=401, detail='Google authentication failed.')
-
-    try:
-        user_info_endpoint = 'https://www.googleapis.com/oauth2/v2/userinfo'
-        headers = {'Authorization': f'Bearer {token['access_token']}'}
-        google_response = requests.get(user_info_endpoint, headers=headers)
-        user_info = google_response.json()
+        token = await fetch_google_token(request)
+        user = token['userinfo']
     except Exception as e:
         raise HTTPException(status_code=401, detail='Google authentication failed.')
 
-    user = token.get('userinfo')
     google_id = user.get('sub')
     iss = user.get('iss')
     email = user.get('email')
     first_logged_in = dt.now(datetime.timezone.utc)
     last_accessed = dt.now(datetime.timezone.utc)
 
-    name = user_info.get('name')
-    image_url = user_info.get('picture')
+    name = user.get('name')
+    image_url = user.get('picture')
 
-    if iss not in ['https://accounts.google.com', 'accounts.google.com']:
+    if iss not in GOOGLE_ISSUERS:
         raise HTTPException(status_code=401, detail='Google authentication failed.')
 
     if google_id is None:
@@ -120,7 +133,10 @@ async def get_me(request: Request):
     
 
 @router.get('/logout')
-async def logout():
+async def logout(request: Request, db: AsyncConnection = Depends(get_db)):
+    token = request.cookies.get('access_token')
+    if token:
+        await revoke_session(db, token)
     response = RedirectResponse(url=settings.FRONTEND_URL)
     response.delete_cookie(key='access_token')
     return response
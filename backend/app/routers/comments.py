@@ -1,15 +1,51 @@
+import asyncio
 from datetime import datetime as dt
 import re
-import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Request
+from fastapi.responses import StreamingResponse
+import orjson
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncConnection
 
+from app.cache import cache, pack, unpack
+from app.comment_events import comment_broker, notify
+from app.comment_writer import comment_writer, insert_comment, new_comment_row
+from app.compression import encoded_response
+from app.conditional import is_not_modified, not_modified, page_validators, validator_headers
 from app.database import get_db
+from app.feed import home_feed
 from app.models.comment import Comment
-from app.utils import get_current_user
-from app.schemas.comment import CommentCreateUpdate, CommentOut
+from app.pagination import decode_cursor, encode_cursor
+from app.render import render_content
+from app.settings import settings
+from app.utils import COMMENT_PATH_SEPARATOR, comment_path_ids, get_current_user
+from app.schemas.comment import CommentCreateUpdate, CommentOut, CommentPage
+
+
+COMMENT_COLUMNS = '''
+    c.id AS comment_id,
+    c.post_id,
+    c.user_id,
+    c.parent_id,
+    c.path,
+    c.depth,
+    c.reply_count,
+    c.is_deleted,
+    -- Tombstones keep their place in the tree but not their text.
+    CASE WHEN c.is_deleted THEN CAST('""' AS JSON) ELSE c.content END AS content,
+    CASE WHEN c.is_deleted THEN NULL ELSE c.content_html END AS content_html,
+    c.created_at,
+    GREATEST(c.updated_at, u.updated_at) AS last_modified,
+    u.name AS user_name,
+    u.email AS user_email,
+    u.image AS user_image
+'''
+
+# A deleted comment stays in the tree as a tombstone while it still has live
+# replies, so its subtree remains reachable; reply_count counts live
+# descendants only.
+VISIBLE = '(is_deleted = false OR reply_count > 0)'
 
 
 router = APIRouter(prefix='/comments', tags=['Comments'])
@@ -19,28 +55,44 @@ router = APIRouter(prefix='/comments', tags=['Comments'])
 async def create_comment(
     post_id: str,
     comment: CommentCreateUpdate,
+    parent_id: str | None = None,
     db: AsyncConnection = Depends(get_db),
     user: dict = Depends(get_current_user)
 ):
-    '''Create a new comment.'''
+    '''Create a new comment, or a reply to `parent_id` on the same post.'''
+    parent = None
+    if parent_id:
+        result = await db.execute(
+            text(f'SELECT path, depth FROM comments WHERE id = :id AND post_id = :post_id AND {VISIBLE}'),
+            {'id': parent_id, 'post_id': post_id},
+        )
+        parent = result.first()
+        if not parent:
+            raise HTTPException(status_code=404, detail='Parent comment not found')
+        if parent.depth + 1 > settings.COMMENT_MAX_DEPTH:
+            raise HTTPException(
+                status_code=422,
+                detail=f'Replies cannot be nested more than {settings.COMMENT_MAX_DEPTH} levels deep',
+            )
+
     try:
         user_id = user.get('user_id')
         if not user_id:
             raise HTTPException(status_code=401, detail='Unauthorized')
 
-        now = int(dt.now().timestamp())
-        new_comment = Comment(
-            id=str(uuid.uuid4()),
-            post_id=post_id,
-            content=comment.content,
-            user_id=user_id,
-            created_at=now,
-            updated_at=now,
+        row = new_comment_row(
+            post_id, user_id, comment.content, parent_id,
+            parent.path if parent else None, parent.depth if parent else -1,
         )
-        db.add(new_comment)
-        await db.commit()
-        await db.refresh(new_comment)
-        return new_comment
+        if settings.COMMENT_GROUP_COMMIT:
+            # Hand back any connection the parent lookup checked out while
+            # the row waits for its batch.
+            await db.close()
+            return await comment_writer.submit(row)
+        await insert_comment(db, row)
+        await cache.delete(f'comments:{post_id}')
+        await home_feed.invalidate()
+        return row
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -49,36 +101,216 @@ async def create_comment(
         )
     
 
-@router.get('/{post_id}')
-async def get_comments(
+async def _adjust_reply_counts(db: AsyncConnection, path: str, delta: int) -> None:
+    '''Add `delta` to the reply count of every comment on `path`.'''
+    await db.execute(
+        text('''
+            UPDATE comments
+            SET reply_count = GREATEST(reply_count + :delta, 0)
+            WHERE id = ANY(CAST(:ids AS VARCHAR[]))
+        '''),
+        {'ids': sorted(comment_path_ids(path)), 'delta': delta},
+    )
+
+
+async def fetch_comment_page(
+    db: AsyncConnection,
     post_id: str,
+    limit: int,
+    replies: int,
+    cursor: list | None = None,
+) -> dict:
+    '''Select one page of a post's top-level comments, oldest first, each with its first `replies` replies.
+
+    Roots and replies come back in path order from one query, so each root is
+    directly followed by its replies.
+    '''
+    params = {'post_id': post_id, 'limit': limit + 1, 'replies': replies}
+    keyset = ''
+    if cursor:
+        params['cursor_path'], = cursor
+        keyset = 'AND path > :cursor_path'
+
+    query = text(f"""
+        WITH roots AS (
+            SELECT id, post_id, path
+            FROM comments
+            WHERE post_id = :post_id AND parent_id IS NULL AND {VISIBLE} {keyset}
+            ORDER BY path
+            LIMIT :limit
+        )
+        SELECT {COMMENT_COLUMNS}
+        FROM roots
+        CROSS JOIN LATERAL (
+            (SELECT * FROM comments WHERE id = roots.id)
+            UNION ALL
+            (
+                SELECT * FROM comments r
+                WHERE r.post_id = roots.post_id AND {VISIBLE}
+                    AND r.path > roots.path || '/' AND r.path < roots.path || '0'
+                ORDER BY r.path
+                LIMIT :replies
+            )
+        ) c
+        JOIN users u ON c.user_id = u.id
+        ORDER BY c.path
+    """)
+    result = await db.execute(query, params)
+
+    threads = []
+    for row in result.mappings().all():
+        if row['parent_id'] is None:
+            threads.append({**row, 'replies': []})
+        else:
+            threads[-1]['replies'].append(row)
+
+    next_cursor = None
+    if len(threads) > limit:
+        threads = threads[:limit]
+        next_cursor = encode_cursor(threads[-1]['path'])
+    return {'items': threads, 'next_cursor': next_cursor}
+
+
+@router.get('/batch', response_model=dict[str, list[CommentOut]])
+async def get_comments_batch(
+    post_id: list[str] = Query(..., max_length=100),
+    limit: int = Query(3, ge=1, le=20),
     db: AsyncConnection = Depends(get_db)
-) -> list[CommentOut]:
-    '''Get comments with user info for a specific post.'''
+):
+    '''Get the latest `limit` comments, newest first, for each of several posts.'''
+    post_ids = sorted(set(post_id))
     try:
-        query = text("""
-            SELECT 
-                c.id AS comment_id,
-                c.post_id,
-                c.content,
-                c.created_at,
-                u.name AS user_name,
-                u.email AS user_email,
-                u.image AS user_image
-            FROM comments c
+        query = text(f"""
+            SELECT p.post_id AS requested_post_id, {COMMENT_COLUMNS}
+            FROM unnest(CAST(:post_ids AS VARCHAR[])) AS p(post_id)
+            CROSS JOIN LATERAL (
+                SELECT * FROM comments
+                WHERE comments.post_id = p.post_id AND comments.is_deleted = false
+                ORDER BY comments.created_at DESC, comments.id DESC
+                LIMIT :limit
+            ) c
             JOIN users u ON c.user_id = u.id
-            WHERE c.post_id = :post_id AND c.is_deleted = false
-            ORDER BY c.created_at ASC
+            ORDER BY p.post_id, c.created_at DESC, c.id DESC
         """)
-        result = await db.execute(query, {'post_id': post_id})
+        result = await db.execute(query, {'post_ids': post_ids, 'limit': limit})
+        rows = result.mappings().all()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f'An error occurred while fetching comments: {str(e)}'
+        )
+
+    comments = {post_id: [] for post_id in post_ids}
+    for row in rows:
+        comments[row['requested_post_id']].append(row)
+    return comments
+
+
+@router.get('/thread/{comment_id}', response_model=list[CommentOut])
+async def get_thread(comment_id: str, db: AsyncConnection = Depends(get_db)):
+    '''Get a comment followed by all of its replies, depth first, with deleted ones as tombstones.'''
+    try:
+        query = text(f"""
+            WITH root AS (
+                SELECT post_id, path FROM comments WHERE id = :comment_id AND {VISIBLE}
+            )
+            SELECT {COMMENT_COLUMNS}
+            FROM root
+            JOIN comments c ON c.post_id = root.post_id AND (c.is_deleted = false OR c.reply_count > 0)
+                AND (c.path = root.path OR (c.path > root.path || '/' AND c.path < root.path || '0'))
+            JOIN users u ON c.user_id = u.id
+            ORDER BY c.path
+        """)
+        result = await db.execute(query, {'comment_id': comment_id})
         comments = result.mappings().all()
-        return comments
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f'An error occurred while fetching the thread: {str(e)}'
+        )
+
+    if not comments:
+        raise HTTPException(status_code=404, detail='Comment not found')
+    return comments
+
+
+@router.get('/{post_id}/stream')
+async def stream_comments(post_id: str, request: Request):
+    '''Stream `created`, `updated` and `deleted` comment events for a post as Server-Sent Events.'''
+    queue = comment_broker.subscribe(post_id)
+
+    async def events():
+        try:
+            yield b'retry: 5000\n\n'
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=settings.COMMENT_STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield b': ping\n\n'
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            comment_broker.unsubscribe(post_id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@router.get('/{post_id}', response_model=CommentPage)
+async def get_comments(
+    post_id: str,
+    request: Request,
+    limit: int = Query(settings.COMMENTS_PAGE_SIZE, ge=1, le=100),
+    replies: int = Query(settings.COMMENT_REPLY_PREVIEW, ge=0, le=50),
+    cursor: str | None = None,
+    db: AsyncConnection = Depends(get_db)
+):
+    '''Get top-level comments for a specific post with their first replies, oldest first, one page at a time.'''
+    # Only the first page is shared through the cache; later pages are
+    # read far less often.
+    cacheable = not cursor and limit == settings.COMMENTS_PAGE_SIZE and replies == settings.COMMENT_REPLY_PREVIEW
+    if cacheable:
+        cached = await cache.get(f'comments:{post_id}')
+        if cached is not None:
+            meta, body = unpack(cached)
+            etag, last_modified = meta['etag'], meta['last_modified']
+            if is_not_modified(request, etag, last_modified):
+                return not_modified(etag, last_modified)
+            return encoded_response(request, body, validator_headers(etag, last_modified), settings.COMPRESSION_MINIMUM_SIZE)
+
+    cursor_values = decode_cursor(cursor, str) if cursor else None
+    try:
+        page = await fetch_comment_page(db, post_id, limit, replies, cursor_values)
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f'An error occurred while fetching comments: {str(e)}'
         )
 
+    etag, last_modified = page_validators(
+        [c for thread in page['items'] for c in [thread, *thread['replies']]],
+        ('comment_id', 'last_modified', 'reply_count', 'is_deleted'),
+        'comments', post_id, limit, replies, cursor, page['next_cursor'],
+    )
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+
+    body = orjson.dumps(CommentPage.model_validate(page).model_dump())
+    if cacheable:
+        user_ids = {c['user_id'] for thread in page['items'] for c in [thread, *thread['replies']]}
+        await cache.set(
+            f'comments:{post_id}',
+            pack({'etag': etag, 'last_modified': last_modified}, body),
+            ttl=settings.COMMENTS_CACHE_TTL,
+            tags={f'user:{user_id}' for user_id in user_ids},
+        )
+    return encoded_response(request, body, validator_headers(etag, last_modified), settings.COMPRESSION_MINIMUM_SIZE)
+
 
 @router.delete('/{comment_id}')
 async def delete_comment(
@@ -95,10 +327,21 @@ async def delete_comment(
         comment = await db.get(Comment, comment_id)
         if not comment or comment.user_id != user_id:
             raise HTTPException(status_code=404, detail='Comment not found or unauthorized')
+        if comment.is_deleted:
+            raise HTTPException(status_code=404, detail='Comment is deleted')
 
         comment.is_deleted = True
-        comment.deleted_at = int(dt.now().timestamp())
+        comment.deleted_at = comment.updated_at = int(dt.now().timestamp())
+        await db.execute(
+            text('UPDATE posts SET comment_count = GREATEST(comment_count - 1, 0) WHERE id = :post_id'),
+            {'post_id': comment.post_id},
+        )
+        if comment.parent_id:
+            await _adjust_reply_counts(db, comment.path.rsplit(COMMENT_PATH_SEPARATOR, 1)[0], -1)
+        await notify(db, 'deleted', comment.post_id, comment_id)
         await db.commit()
+        await cache.delete(f'comments:{comment.post_id}')
+        await home_feed.invalidate()
         return {'detail': 'Comment deleted successfully'}
     except Exception as e:
         await db.rollback()
@@ -128,8 +371,11 @@ async def update_comment(
             raise HTTPException(status_code=404, detail='Comment is deleted')
 
         comment.content = updated_comment.content
+        comment.content_html = render_content(updated_comment.content).html
         comment.updated_at = int(dt.now().timestamp())
+        await notify(db, 'updated', comment.post_id, comment_id)
         await db.commit()
+        await cache.delete(f'comments:{comment.post_id}')
         return {'detail': 'Comment updated successfully'}
     except Exception as e:
         await db.rollback()
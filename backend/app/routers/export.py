@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.exporter import export_ndjson
+from app.utils import get_current_user
+
+router = APIRouter(prefix='/export', tags=['Export'])
+
+
+@router.get('/posts.ndjson')
+async def export_posts(
+    since: int = Query(0, ge=0),
+    user: dict = Depends(get_current_user)
+):
+    '''Stream the current user's posts and comments updated after `since` as NDJSON.'''
+    user_id = user.get('user_id')
+    if not user_id:
+        raise HTTPException(status_code=401, detail='Unauthorized')
+
+    # The stream opens its own session: request-scoped dependencies are
+    # closed before the response body is sent.
+    return StreamingResponse(export_ndjson(since, user_id), media_type='application/x-ndjson')
@@ -1,18 +1,49 @@
 from datetime import datetime as dt
-import re
+from html import escape, unescape
+from typing import Literal
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+import orjson
 from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncConnection
 
+from app.cache import cache, pack, unpack
+from app.compression import encoded_response
+from app.conditional import body_etag, is_not_modified, not_modified, page_validators, validator_headers
 from app.database import get_db
-from app.schemas.post import PostCreateUpdate, PostOut
+from app.feed import fetch_post_page, home_feed
+from app.importer import ImportResult, import_posts, iter_lines
+from app.pagination import decode_cursor, encode_cursor
+from app.schemas.post import PostCreateUpdate, PostOut, PostPage, PostSearchPage
 from app.models.post import Post
-from app.utils import generate_unique_slug, get_current_user
+from app.settings import settings
+from app.render import render_content
+from app.utils import adjust_tag_counts, allocate_slugs, get_current_user, normalize_tags, slugify, tag_count_changes
+from app.view_counter import view_counter
 
 router = APIRouter(prefix='/posts', tags=['Posts'])
 
+# Private-use characters mark search hits in ts_headline output, so the
+# snippet can be escaped as plain text before the marks become HTML.
+HIGHLIGHT_START = '\ue000'
+HIGHLIGHT_STOP = '\ue001'
+HEADLINE_OPTIONS = f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxFragments=2, MaxWords=30, MinWords=10'
+
+
+def highlight_snippet(headline: str | None) -> str | None:
+    '''Turn a ts_headline over the rendered text into safe HTML with `<mark>` hits.'''
+    if headline is None:
+        return None
+    # The headline is built from sanitized HTML with its tags stripped, so it
+    # still carries that HTML's entities; decode them before escaping.
+    return (
+        escape(unescape(headline), quote=False)
+        .replace(HIGHLIGHT_START, '<mark>')
+        .replace(HIGHLIGHT_STOP, '</mark>')
+    )
+
 
 @router.post('/')
 async def create_post(
@@ -26,26 +57,38 @@ async def create_post(
         if not user_id:
             raise HTTPException(status_code=401, detail='Unauthorized')
         
-        slug_base = re.sub(r'[^\w]+', '-', post.title.lower()).strip('-')
-        query = text('SELECT slug FROM posts WHERE slug LIKE :like')
-        result = await db.execute(query, {'like': f'{slug_base}%'})
-        existing_slugs = {row.slug for row in result.mappings().all()}
-        unique_slug = await generate_unique_slug(post.title, existing_slugs)
-
+        post.tags = normalize_tags(post.tags)
         now = int(dt.now().timestamp())
-        new_post = Post(
+        rendered = render_content(post.content)
+        values = {
             **post.model_dump(),
-            id = str(uuid.uuid4()),
-            slug = unique_slug,
-            created_at = now,
-            updated_at = now,
-            is_published = True,
-            user_id = user_id,
-        )
-        db.add(new_post)
+            'id': str(uuid.uuid4()),
+            'content_html': rendered.html,
+            'excerpt': rendered.excerpt,
+            'word_count': rendered.word_count,
+            'reading_time': rendered.reading_time,
+            'first_image': rendered.first_image,
+            'created_at': now,
+            'updated_at': now,
+            'is_published': True,
+            'views': 0,
+            'user_id': user_id,
+        }
+        # A counter-issued slug can still clash with a legacy or literal
+        # title slug; ON CONFLICT skips the row and the next suffix is tried.
+        base_slug = slugify(post.title)
+        inserted = None
+        while inserted is None:
+            values['slug'] = (await allocate_slugs(db, {base_slug: 1}))[base_slug][0]
+            result = await db.execute(
+                insert(Post).values(**values).on_conflict_do_nothing(index_elements=['slug']).returning(Post.id)
+            )
+            inserted = result.scalar_one_or_none()
+
+        await adjust_tag_counts(db, *tag_count_changes(None, False, values['tags'], values['is_published']))
         await db.commit()
-        await db.refresh(new_post)
-        return new_post
+        await home_feed.invalidate()
+        return await db.get(Post, inserted)
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -54,53 +97,214 @@ async def create_post(
         )
     
 
+@router.post('/import')
+async def import_posts_ndjson(
+    request: Request,
+    start_line: int = Query(0, ge=0),
+    batch_size: int = Query(settings.IMPORT_BATCH_SIZE, ge=1, le=10000),
+    db: AsyncConnection = Depends(get_db),
+    user: dict = Depends(get_current_user)
+):
+    '''Bulk import posts from an NDJSON request body.
+
+    Batches are committed as they are loaded; on failure, retry with
+    `start_line` set to the `last_line` reported by the previous attempt.
+    '''
+    user_id = user.get('user_id')
+    if not user_id:
+        raise HTTPException(status_code=401, detail='Unauthorized')
+
+    result = ImportResult(last_line=start_line)
+
+    def track(progress: ImportResult) -> None:
+        result.imported, result.last_line = progress.imported, progress.last_line
+
+    try:
+        result = await import_posts(db, iter_lines(request.stream()), user_id, batch_size, start_line, track)
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail={
+                'message': f'An error occurred while importing posts: {str(e)}',
+                'imported': result.imported,
+                'last_line': result.last_line,
+            }
+        )
+    finally:
+        if result.imported:
+            await home_feed.invalidate()
+    return {'imported': result.imported, 'last_line': result.last_line, 'errors': result.errors}
+
+
 @router.get('/')
-async def get_posts(db: AsyncConnection = Depends(get_db)) -> list[PostOut]:
-    '''Retrieve all posts.'''
+async def get_posts(
+    request: Request,
+    response: Response,
+    limit: int = Query(settings.FEED_SIZE, ge=1, le=100),
+    cursor: str | None = None,
+    tag: list[str] | None = Query(None),
+    match: Literal['all', 'any'] = 'all',
+    db: AsyncConnection = Depends(get_db)
+) -> PostPage:
+    '''Retrieve published post summaries, newest first, one page at a time.
+
+    Repeat `tag` to filter; `match=all` requires every tag, `match=any` at least one.
+    '''
+    if not cursor and not tag and limit == home_feed.limit:
+        try:
+            body, etag, last_modified = await home_feed.get()
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f'An error occurred while retrieving posts: {str(e)}'
+            )
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+        return encoded_response(request, body, validator_headers(etag, last_modified), settings.COMPRESSION_MINIMUM_SIZE)
+
+    tags = normalize_tags(tag)
+    cursor_values = decode_cursor(cursor, int, str) if cursor else None
+
     try:
-        query = text('''
-            SELECT 
-                posts.id, posts.slug, posts.title, posts.content, posts.tags,
-                users.name AS user_name, users.email AS user_email, users.image AS user_image
-            FROM posts
-            JOIN users ON posts.user_id = users.id
-            WHERE posts.is_published = true
-            ORDER BY posts.created_at DESC
-        ''')
-        result = await db.execute(query)
-        posts = result.mappings().all()
-        return posts
+        page = await fetch_post_page(db, limit, cursor_values, tags, match)
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f'An error occurred while retrieving posts: {str(e)}'
         )
 
+    # Validators come from the page itself, so a conditional request costs
+    # the same keyset query and never a scan of the whole table.
+    etag, last_modified = page_validators(
+        page['items'], ('id', 'last_modified', 'comment_count'),
+        'posts', limit, cursor, tags, match, page['next_cursor'],
+    )
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    response.headers.update(validator_headers(etag, last_modified))
+    return page
+
+
+@router.get('/search')
+async def search_posts(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    db: AsyncConnection = Depends(get_db)
+) -> PostSearchPage:
+    '''Full-text search over published posts, best matches first.'''
+    params = {
+        'q': q,
+        'limit': limit + 1,
+        'headline_options': HEADLINE_OPTIONS,
+        'highlight_marks': HIGHLIGHT_START + HIGHLIGHT_STOP,
+    }
+    keyset = ''
+    if cursor:
+        params['cursor_rank'], params['cursor_id'] = decode_cursor(cursor, float, str)
+        keyset = 'WHERE (ranked.rank, ranked.id) < (:cursor_rank, :cursor_id)'
 
-@router.get('/{slug}')
-async def get_post(slug: str, db: AsyncConnection = Depends(get_db)) -> PostOut:
-    '''Retrieve a single post by slug.'''
     try:
-        query = text('''
-            SELECT 
-                posts.id, posts.slug, posts.title, posts.content, posts.tags,
-                users.id AS user_id, users.name AS user_name, users.email AS user_email, users.image AS user_image
-            FROM posts
+        # Headlines are expensive, so they are only built for the rows on this
+        # page, and only from the rendered text: never from raw content.
+        query = text(f'''
+            WITH q AS (
+                SELECT websearch_to_tsquery('english', :q) AS query
+            ),
+            page AS (
+                SELECT ranked.id, ranked.rank
+                FROM (
+                    SELECT posts.id, ts_rank_cd(posts.search_vector, q.query)::float8 AS rank
+                    FROM posts, q
+                    WHERE posts.is_published = true AND posts.search_vector @@ q.query
+                ) ranked
+                {keyset}
+                ORDER BY ranked.rank DESC, ranked.id DESC
+                LIMIT :limit
+            )
+            SELECT
+                posts.id, posts.slug, posts.title, posts.tags, posts.excerpt, posts.reading_time,
+                posts.comment_count, page.rank,
+                ts_headline(
+                    'english',
+                    translate(
+                        regexp_replace(COALESCE(posts.content_html, ''), '<[^>]*>', ' ', 'g'),
+                        :highlight_marks, ''
+                    ),
+                    q.query,
+                    :headline_options
+                ) AS snippet,
+                users.name AS user_name, users.email AS user_email, users.image AS user_image
+            FROM page
+            JOIN posts ON posts.id = page.id
             JOIN users ON posts.user_id = users.id
-            WHERE posts.slug = :slug AND posts.is_published = true
-            LIMIT 1
+            CROSS JOIN q
+            ORDER BY page.rank DESC, page.id DESC
         ''')
-        result = await db.execute(query, {'slug': slug})
-        post = result.mappings().first()
-        if not post:
-            raise HTTPException(status_code=404, detail='Post not found')
-        return post
+        result = await db.execute(query, params)
+        posts = result.mappings().all()
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail=f'An error occurred while retrieving the post: {str(e)}'
+            detail=f'An error occurred while searching posts: {str(e)}'
         )
 
+    next_cursor = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        next_cursor = encode_cursor(posts[-1]['rank'], posts[-1]['id'])
+    items = [{**post, 'snippet': highlight_snippet(post['snippet'])} for post in posts]
+    return {'items': items, 'next_cursor': next_cursor}
+
+
+@router.get('/{slug}', response_model=PostOut)
+async def get_post(slug: str, request: Request, db: AsyncConnection = Depends(get_db)):
+    '''Retrieve a single post by slug.'''
+    # The session only checks out a connection on first execute, so cache
+    # hits never touch the pool.
+    cached = await cache.get(f'post:{slug}')
+    if cached is not None:
+        meta, body = unpack(cached)
+    else:
+        try:
+            query = text('''
+                SELECT 
+                    posts.id, posts.slug, posts.title, posts.content, posts.content_html, posts.tags,
+                    posts.word_count, posts.reading_time, posts.first_image,
+                    users.id AS user_id, users.name AS user_name, users.email AS user_email, users.image AS user_image,
+                    GREATEST(posts.updated_at, users.updated_at) AS last_modified
+                FROM posts
+                JOIN users ON posts.user_id = users.id
+                WHERE posts.slug = :slug AND posts.is_published = true
+                LIMIT 1
+            ''')
+            result = await db.execute(query, {'slug': slug})
+            post = result.mappings().first()
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f'An error occurred while retrieving the post: {str(e)}'
+            )
+
+        if not post:
+            raise HTTPException(status_code=404, detail='Post not found')
+        body = orjson.dumps(PostOut.model_validate(dict(post)).model_dump())
+        meta = {'id': post['id'], 'etag': body_etag(body), 'last_modified': post['last_modified']}
+        await cache.set(
+            f'post:{slug}',
+            pack(meta, body),
+            ttl=settings.POST_CACHE_TTL,
+            tags=[f"user:{post['user_id']}"],
+        )
+
+    etag, last_modified = meta['etag'], meta['last_modified']
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    # Revalidations (304) are not page loads, so only full responses count.
+    view_counter.record(meta['id'])
+    return encoded_response(request, body, validator_headers(etag, last_modified), settings.COMPRESSION_MINIMUM_SIZE)
+
 
 @router.delete('/{slug}')
 async def delete_post(
@@ -117,12 +321,17 @@ async def delete_post(
         query = text('''
             DELETE FROM posts 
             WHERE slug = :slug AND user_id = :user_id
+            RETURNING id, tags, is_published
         ''')
         result = await db.execute(query, {'slug': slug, 'user_id': user_id})
-        if result.rowcount == 0:
+        deleted = result.first()
+        if not deleted:
             raise HTTPException(status_code=404, detail='Post not found or unauthorized')
 
+        await adjust_tag_counts(db, *tag_count_changes(deleted.tags, deleted.is_published, None, False))
         await db.commit()
+        await cache.delete(f'post:{slug}', f'comments:{deleted.id}')
+        await home_feed.invalidate()
         return {'detail': 'Post deleted successfully'}
     except Exception as e:
         await db.rollback()
@@ -160,12 +369,24 @@ async def update_post(
         if not existing_post:
             raise HTTPException(status_code=404, detail='Post record could not be loaded')
 
+        post.tags = normalize_tags(post.tags)
+        await adjust_tag_counts(db, *tag_count_changes(
+            existing_post.tags, existing_post.is_published, post.tags, existing_post.is_published,
+        ))
         for key, value in post.model_dump().items():
             setattr(existing_post, key, value)
 
+        rendered = render_content(post.content)
+        existing_post.content_html = rendered.html
+        existing_post.excerpt = rendered.excerpt
+        existing_post.word_count = rendered.word_count
+        existing_post.reading_time = rendered.reading_time
+        existing_post.first_image = rendered.first_image
         existing_post.updated_at = int(dt.now().timestamp())
 
         await db.commit()
+        await cache.delete(f'post:{slug}')
+        await home_feed.invalidate()
         await db.refresh(existing_post)
         return {'id': existing_post.id}
 
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.database import get_db
+from app.schemas.tag import TagOut
+
+router = APIRouter(prefix='/tags', tags=['Tags'])
+
+
+@router.get('/')
+async def get_tags(
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncConnection = Depends(get_db)
+) -> list[TagOut]:
+    '''Retrieve tags with the number of posts using each, most used first.'''
+    try:
+        query = text('''
+            SELECT tag, post_count
+            FROM tag_counts
+            WHERE post_count > 0
+            ORDER BY post_count DESC, tag ASC
+            LIMIT :limit
+        ''')
+        result = await db.execute(query, {'limit': limit})
+        return result.mappings().all()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f'An error occurred while retrieving tags: {str(e)}'
+        )
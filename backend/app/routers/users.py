@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.database import get_db
+from app.feed import fetch_post_page
+from app.pagination import decode_cursor
+from app.schemas.post import AuthorPostPage, PostPage
+from app.utils import get_current_user
+
+router = APIRouter(prefix='', tags=['Users'])
+
+
+@router.get('/users/{user_id}/posts')
+async def get_user_posts(
+    user_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    db: AsyncConnection = Depends(get_db)
+) -> PostPage:
+    '''Retrieve one author's published posts, newest first.'''
+    cursor_values = decode_cursor(cursor, int, str) if cursor else None
+    try:
+        return await fetch_post_page(db, limit, cursor_values, user_id=user_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f'An error occurred while retrieving posts: {str(e)}'
+        )
+
+
+@router.get('/me/posts')
+async def get_my_posts(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    db: AsyncConnection = Depends(get_db),
+    user: dict = Depends(get_current_user)
+) -> AuthorPostPage:
+    '''Retrieve the current user's posts, drafts included, newest first.'''
+    user_id = user.get('user_id')
+    if not user_id:
+        raise HTTPException(status_code=401, detail='Unauthorized')
+
+    cursor_values = decode_cursor(cursor, int, str) if cursor else None
+    try:
+        return await fetch_post_page(db, limit, cursor_values, user_id=user_id, published_only=False)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f'An error occurred while retrieving posts: {str(e)}'
+        )
@@ -8,7 +8,21 @@ class CommentCreateUpdate(BaseModel):
 class CommentOut(CommentCreateUpdate):
     comment_id: str
     post_id: str
+    parent_id: str | None = None
+    depth: int = 0
+    reply_count: int = 0
+    is_deleted: bool = False
+    content_html: str | None = None
     created_at: int
     user_name: str
     user_email: str
-    user_image: str | None = None
\ No newline at end of file
+    user_image: str | None = None
+
+
+class CommentThread(CommentOut):
+    replies: list[CommentOut] = []
+
+
+class CommentPage(BaseModel):
+    items: list[CommentThread]
+    next_cursor: str | None = None
@@ -10,6 +10,46 @@ class PostCreateUpdate(BaseModel):
 class PostOut(PostCreateUpdate):
     id: str
     slug: str
+    content_html: str | None = None
+    word_count: int | None = None
+    reading_time: int | None = None
+    first_image: str | None = None
     user_name: str
     user_email: str
-    user_image: str | None = None
\ No newline at end of file
+    user_image: str | None = None
+
+
+class PostSummary(BaseModel):
+    id: str
+    slug: str
+    title: str
+    tags: list[str] | None = None
+    excerpt: str | None = None
+    reading_time: int | None = None
+    comment_count: int = 0
+    user_name: str
+    user_email: str
+    user_image: str | None = None
+
+
+class PostPage(BaseModel):
+    items: list[PostSummary]
+    next_cursor: str | None = None
+
+
+class AuthorPostSummary(PostSummary):
+    is_published: bool
+
+
+class AuthorPostPage(BaseModel):
+    items: list[AuthorPostSummary]
+    next_cursor: str | None = None
+
+
+class PostSearchResult(PostSummary):
+    snippet: str | None = None
+
+
+class PostSearchPage(BaseModel):
+    items: list[PostSearchResult]
+    next_cursor: str | None = None
@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+
+class TagOut(BaseModel):
+    tag: str
+    post_count: int
@@ -17,6 +17,54 @@ class Settings(BaseSettings):
     FRONTEND_URL: str
     ALGORITHM: str = 'HS256'
 
+    CACHE_URL: str = 'memory://'
+    CACHE_PREFIX: str = 'eromance:'
+    CACHE_SIZE: int = 4096
+    POST_CACHE_TTL: int = 60
+    COMMENTS_CACHE_TTL: int = 60
+    COMMENTS_PAGE_SIZE: int = 50
+    COMMENT_REPLY_PREVIEW: int = 3
+    COMMENT_STREAM_QUEUE_SIZE: int = 100
+    COMMENT_STREAM_HEARTBEAT: float = 15.0
+    # Each level adds a 47-byte path segment; 32 levels stay well under the
+    # btree limit on the path index.
+    COMMENT_MAX_DEPTH: int = 32
+
+    COMMENT_GROUP_COMMIT: bool = False
+    COMMENT_GROUP_COMMIT_SIZE: int = 100
+    COMMENT_GROUP_COMMIT_WINDOW: float = 0.01
+    COMMENT_GROUP_COMMIT_QUEUE_SIZE: int = 1000
+    USER_CACHE_TTL: int = 300
+    # Without a shared cache a logout only reaches the worker that served it,
+    # so tokens are cached per worker for just a few seconds.
+    LOCAL_USER_CACHE_TTL: int = 5
+
+    VIEW_FLUSH_INTERVAL: float = 5.0
+    VIEW_FLUSH_BATCH_SIZE: int = 500
+
+    IMPORT_BATCH_SIZE: int = 1000
+
+    FEED_SIZE: int = 20
+    FEED_MAX_AGE: float = 30.0
+
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+
+    COMMENT_PURGE_AFTER_DAYS: int = 30
+    PURGE_BATCH_SIZE: int = 500
+    PURGE_PAUSE: float = 0.5
+    PURGE_INTERVAL: float = 3600.0
+
+    SESSION_CHECK: bool = False
+
+    HTTP_TIMEOUT: float = 5.0
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_RETRIES: int = 2
+    HTTP_BACKOFF: float = 0.2
+
+    GOOGLE_JWKS_URL: str = 'https://www.googleapis.com/oauth2/v3/certs'
+    JWKS_DEFAULT_MAX_AGE: float = 3600.0
+    JWKS_MIN_REFRESH: float = 60.0
+
     class Config:
         env_file = '.env'
 
@@ -3,28 +3,113 @@ from datetime import (
     timedelta
 )
 import datetime
+import hashlib
 import re
 import uuid
 import traceback
 
 from jose import jwt, ExpiredSignatureError, JWTError
+import orjson
 from fastapi import HTTPException, Cookie
 from sqlalchemy.ext.asyncio import AsyncConnection
 from sqlalchemy import text
 from fastapi import Depends
 
+from app.cache import cache
 from app.settings import settings
 from app.database import get_db
 
 
-async def generate_unique_slug(title: str, existing_slugs: set[str]) -> str:
-    base_slug = re.sub(r'[^\w]+', '-', title.lower()).strip('-')
-    slug = base_slug
-    suffix = 1
-    while slug in existing_slugs:
-        slug = f'{base_slug}_{suffix}'
-        suffix += 1
-    return slug
+def slugify(title: str) -> str:
+    return re.sub(r'[^\w]+', '-', title.lower()).strip('-') or 'post'
+
+
+COMMENT_PATH_SEPARATOR = '/'
+
+
+def comment_path(created_at: int, comment_id: str, parent_path: str | None = None) -> str:
+    '''Materialized path of a comment: its parent's path plus its own segment.
+
+    Segments are the zero-padded creation time followed by the id, so sorting
+    by path yields threads depth first with siblings oldest first, and every
+    descendant of `p` sorts between `p + '/'` and `p + '0'`. Paths grow with
+    depth, which is why replies are capped at `COMMENT_MAX_DEPTH` levels.
+    '''
+    segment = f'{created_at:010d}{comment_id}'
+    return f'{parent_path}{COMMENT_PATH_SEPARATOR}{segment}' if parent_path else segment
+
+
+def comment_path_ids(path: str) -> list[str]:
+    '''Ids of every comment on `path`, root first.'''
+    return [segment[10:] for segment in path.split(COMMENT_PATH_SEPARATOR)]
+
+
+async def allocate_slugs(db: AsyncConnection, counts: dict[str, int]) -> dict[str, list[str]]:
+    '''Reserve the next `counts[base]` suffixes for each base slug from its counter row.
+
+    The upsert locks those counter rows until the caller commits, so concurrent
+    writers for the same base queue up instead of racing to the same slug.
+    '''
+    bases = sorted(counts)
+    query = text('''
+        INSERT INTO slug_counters (base_slug, counter)
+        SELECT base_slug, n - 1
+        FROM unnest(CAST(:bases AS VARCHAR[]), CAST(:counts AS INTEGER[])) AS t(base_slug, n)
+        ON CONFLICT (base_slug) DO UPDATE SET counter = slug_counters.counter + EXCLUDED.counter + 1
+        RETURNING base_slug, counter
+    ''')
+    result = await db.execute(query, {'bases': bases, 'counts': [counts[base] for base in bases]})
+    slugs = {}
+    for base_slug, last in result.all():
+        first = last - counts[base_slug] + 1
+        slugs[base_slug] = [
+            base_slug if suffix == 0 else f'{base_slug}_{suffix}'
+            for suffix in range(first, last + 1)
+        ]
+    return slugs
+
+
+def normalize_tags(tags: list[str] | None) -> list[str] | None:
+    '''Stored form of a post's tags: trimmed, deduplicated and sorted, or None when empty.'''
+    normalized = sorted({tag.strip() for tag in tags or ()} - {''})
+    return normalized or None
+
+
+def tag_count_changes(
+    old_tags: list[str] | None,
+    old_published: bool,
+    new_tags: list[str] | None,
+    new_published: bool,
+) -> tuple[set[str], set[str]]:
+    '''`(added, removed)` for a post moving between two states; only published posts count.
+
+    Publishing counts every tag, unpublishing uncounts them, and drafts never
+    touch tag_counts, matching the listings and filters, which only show
+    published posts.
+    '''
+    old = set(old_tags or []) if old_published else set()
+    new = set(new_tags or []) if new_published else set()
+    return new - old, old - new
+
+
+async def adjust_tag_counts(db: AsyncConnection, added: set[str], removed: set[str]):
+    '''Apply a post's tag changes to tag_counts inside the caller's transaction.'''
+    # Sorted tags keep row lock order consistent between concurrent writers.
+    if added:
+        await db.execute(text('''
+            INSERT INTO tag_counts (tag, post_count)
+            SELECT tag, 1 FROM unnest(CAST(:tags AS VARCHAR[])) AS tag
+            ON CONFLICT (tag) DO UPDATE SET post_count = tag_counts.post_count + 1
+        '''), {'tags': sorted(added)})
+    if removed:
+        await db.execute(text('''
+            UPDATE tag_counts SET post_count = post_count - 1
+            WHERE tag = ANY(CAST(:tags AS VARCHAR[]))
+        '''), {'tags': sorted(removed)})
+        await db.execute(text('''
+            DELETE FROM tag_counts
+            WHERE tag = ANY(CAST(:tags AS VARCHAR[])) AND post_count <= 0
+        '''), {'tags': sorted(removed)})
 
 
 async def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
@@ -44,7 +129,7 @@ async def log_user(
     last_accessed: dt,
 ):
     try:
-        check_query = text('SELECT 1 FROM users WHERE email = :email')
+        check_query = text('SELECT id FROM users WHERE email = :email')
         result = await db.execute(check_query, {'email': email})
         user = result.fetchone()
 
@@ -80,6 +165,9 @@ async def log_user(
             })
 
         await db.commit()
+        if user:
+            # Cached posts and comments embed the user's name and image.
+            await cache.invalidate_tags(f'user:{user.id}')
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail='Internal server error logging user')
@@ -116,10 +204,45 @@ async def log_token(
         raise HTTPException(status_code=500, detail='Internal server error logging token')
     
 
+def token_cache_key(token: str) -> str:
+    return f'token:{hashlib.sha256(token.encode()).hexdigest()}'
+
+
+async def revoke_token(token: str) -> None:
+    '''Forget a verified token so its next use is checked from scratch.'''
+    await cache.delete(token_cache_key(token))
+
+
+async def revoke_session(db: AsyncConnection, token: str) -> None:
+    '''Delete the session issued with `token` and revoke the token.
+
+    Revocation is immediate on every worker only with a shared cache
+    (CACHE_URL=redis://...); with the in-memory cache other workers keep
+    accepting the token for up to LOCAL_USER_CACHE_TTL seconds.
+    '''
+    await db.execute(text('DELETE FROM sessions WHERE session_token = :token'), {'token': token})
+    await db.commit()
+    try:
+        await revoke_token(token)
+    except Exception:
+        # The session row is already gone; a cache error must not fail the logout.
+        traceback.print_exc()
+
+
 async def get_current_user(token: str = Cookie(None, alias='access_token'), db: AsyncConnection = Depends(get_db)):
     if not token:
         raise HTTPException(status_code=401, detail='Not authenticated')
 
+    # Tokens seen before skip both the signature check and the user lookup;
+    # the session only checks out a connection on a miss.
+    cache_key = token_cache_key(token)
+    cached = await cache.get(cache_key)
+    if cached is not None:
+        user = orjson.loads(cached)
+        if user.pop('exp') > dt.now(datetime.timezone.utc).timestamp():
+            return user
+        await cache.delete(cache_key)
+
     credentials_exception = HTTPException(
         status_code=401,
         detail='Could not validate credentials',
@@ -131,15 +254,34 @@ async def get_current_user(token: str = Cookie(None, alias='access_token'), db:
         email: str = payload.get('email')
         if google_id is None or email is None:
             raise credentials_exception
-        
-        query = text('SELECT id FROM users WHERE google_id = :google_id AND email = :email LIMIT 1')
-        result = await db.execute(query, {"google_id": google_id, 'email': email})
-        user_data = result.mappings().first()
 
-        if not user_data:
+        params = {"google_id": google_id, 'email': email}
+        if settings.SESSION_CHECK:
+            # Only tokens with a live session row are accepted, so deleting
+            # the row (logout, reaper) really revokes the token.
+            query = text('''
+                SELECT users.id
+                FROM sessions
+                JOIN users ON sessions.user_id = users.id
+                WHERE sessions.session_token = :token AND sessions.expires > :now
+                    AND users.google_id = :google_id AND users.email = :email
+            ''')
+            params.update(token=token, now=int(dt.now(datetime.timezone.utc).timestamp()))
+        else:
+            query = text('SELECT id FROM users WHERE google_id = :google_id AND email = :email LIMIT 1')
+        result = await db.execute(query, params)
+        user_id = result.scalar_one_or_none()
+
+        if not user_id:
             raise HTTPException(status_code=404, detail='User not found')
 
-        return {'google_id': google_id, 'email': email, 'user_id': user_data.id}
+        user = {'google_id': google_id, 'email': email, 'user_id': user_id}
+        exp = payload['exp']
+        max_ttl = settings.USER_CACHE_TTL if cache.shared else settings.LOCAL_USER_CACHE_TTL
+        ttl = min(max_ttl, exp - dt.now(datetime.timezone.utc).timestamp())
+        if ttl >= 1:
+            await cache.set(cache_key, orjson.dumps({**user, 'exp': exp}), ttl=ttl, tags=[f'user:{user_id}'])
+        return user
 
     except ExpiredSignatureError:
         traceback.print_exc()
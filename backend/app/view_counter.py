@@ -0,0 +1,80 @@
+import asyncio
+from collections import Counter
+import traceback
+
+from sqlalchemy import text
+
+from app.database import AsyncSessionLocal
+from app.settings import settings
+
+
+class ViewCounter:
+    '''Collects post views in memory and writes them out in batched UPDATEs.'''
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._pending: Counter[str] = Counter()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task: asyncio.Task | None = None
+
+    def record(self, post_id: str) -> None:
+        self._pending[post_id] += 1
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        while self._pending:
+            # Sorted ids keep row lock order consistent across workers.
+            ids = sorted(self._pending)[:self.batch_size]
+            batch = {post_id: self._pending.pop(post_id) for post_id in ids}
+            try:
+                await self._write(batch)
+            except Exception:
+                traceback.print_exc()
+                self._pending.update(batch)
+                return
+
+    async def _write(self, batch: dict[str, int]) -> None:
+        params = {}
+        rows = []
+        for i, (post_id, count) in enumerate(batch.items()):
+            params[f'id_{i}'] = post_id
+            params[f'n_{i}'] = count
+            rows.append(f'(CAST(:id_{i} AS VARCHAR), CAST(:n_{i} AS INTEGER))')
+
+        query = text(f'''
+            UPDATE posts
+            SET views = COALESCE(posts.views, 0) + v.n
+            FROM (VALUES {', '.join(rows)}) AS v(id, n)
+            WHERE posts.id = v.id
+        ''')
+        async with AsyncSessionLocal() as db:
+            await db.execute(query, params)
+            await db.commit()
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        '''Stop the flush loop and drain whatever is still pending.'''
+        self._stopping = True
+        self._wakeup.set()
+        if self._task:
+            await self._task
+            self._task = None
+        await self.flush()
+
+
+view_counter = ViewCounter(settings.VIEW_FLUSH_INTERVAL, settings.VIEW_FLUSH_BATCH_SIZE)
@@ -0,0 +1,114 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+import app.cache
+from app.cache import MemoryCache, RedisCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(app.cache.time, 'monotonic', clock)
+    return clock
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_memory_entries_expire(clock):
+    cache = MemoryCache(maxsize=10)
+    run(cache.set('a', b'1', ttl=5))
+    assert run(cache.get('a')) == b'1'
+    clock.now += 5
+    assert run(cache.get('a')) is None
+
+
+def test_memory_evicts_least_recently_used(clock):
+    cache = MemoryCache(maxsize=2)
+    run(cache.set('a', b'1', ttl=60))
+    run(cache.set('b', b'2', ttl=60))
+    run(cache.get('a'))
+    run(cache.set('c', b'3', ttl=60))
+    assert run(cache.get('b')) is None
+    assert run(cache.get('a')) == b'1'
+    assert run(cache.get('c')) == b'3'
+
+
+def test_memory_invalidates_tags(clock):
+    cache = MemoryCache(maxsize=10)
+    run(cache.set('post:a', b'1', ttl=60, tags=['user:1']))
+    run(cache.set('post:b', b'2', ttl=60, tags=['user:1', 'user:2']))
+    run(cache.set('post:c', b'3', ttl=60, tags=['user:2']))
+    run(cache.invalidate_tags('user:1'))
+    assert run(cache.get('post:a')) is None
+    assert run(cache.get('post:b')) is None
+    assert run(cache.get('post:c')) == b'3'
+
+
+def test_memory_prunes_tags_of_evicted_and_expired_entries(clock):
+    cache = MemoryCache(maxsize=2)
+    for i in range(100):
+        run(cache.set(f'token:{i}', b'1', ttl=60, tags=[f'user:{i}']))
+    assert cache.stats()['tags'] == 2
+
+    clock.now += 60
+    run(cache.get('token:98'))
+    run(cache.get('token:99'))
+    assert cache.stats()['tags'] == 0
+
+
+def test_memory_retagging_replaces_old_tags(clock):
+    cache = MemoryCache(maxsize=10)
+    run(cache.set('a', b'1', ttl=60, tags=['user:1']))
+    run(cache.set('a', b'2', ttl=60, tags=['user:2']))
+    run(cache.invalidate_tags('user:1'))
+    assert run(cache.get('a')) == b'2'
+    assert cache.stats()['tags'] == 1
+
+
+def redis_cache(server: fakeredis.FakeServer) -> RedisCache:
+    return RedisCache('redis://unused', 'test:', client=fakeredis.FakeAsyncRedis(server=server))
+
+
+def test_redis_round_trip_and_tags():
+    cache = redis_cache(fakeredis.FakeServer())
+
+    async def main():
+        await cache.set('post:a', b'1', ttl=60, tags=['user:1'])
+        await cache.set('post:b', b'2', ttl=60, tags=['user:2'])
+        assert await cache.get('post:a') == b'1'
+        await cache.invalidate_tags('user:1')
+        assert await cache.get('post:a') is None
+        assert await cache.get('post:b') == b'2'
+        await cache.delete('post:b')
+        assert await cache.get('post:b') is None
+
+    run(main())
+
+
+def test_redis_fails_open():
+    server = fakeredis.FakeServer()
+    cache = redis_cache(server)
+    server.connected = False
+
+    async def main():
+        await cache.set('a', b'1', ttl=60, tags=['user:1'])
+        assert await cache.get('a') is None
+        await cache.delete('a')
+        await cache.invalidate_tags('user:1')
+
+    run(main())
+    stats = cache.stats()
+    assert stats['errors'] == 4
+    assert stats['misses'] == 1
@@ -0,0 +1,28 @@
+import asyncio
+from types import SimpleNamespace
+
+from fastapi import HTTPException
+import pytest
+
+from app.routers.comments import create_comment
+from app.schemas.comment import CommentCreateUpdate
+from app.settings import settings
+
+
+class ParentLookup:
+    '''Connection that only answers the parent lookup.'''
+
+    def __init__(self, depth: int):
+        self.parent = SimpleNamespace(path='0000000001parent', depth=depth)
+
+    async def execute(self, query, params):
+        return SimpleNamespace(first=lambda: self.parent)
+
+
+def test_rejects_replies_beyond_max_depth():
+    db = ParentLookup(depth=settings.COMMENT_MAX_DEPTH)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(create_comment(
+            'post', CommentCreateUpdate(content='too deep'), 'parent', db, {'user_id': 'user'},
+        ))
+    assert error.value.status_code == 422
@@ -0,0 +1,35 @@
+from app.conditional import page_validators
+
+
+COLUMNS = ('id', 'last_modified', 'comment_count')
+
+
+def rows(**overrides):
+    return [
+        {'id': 'a', 'last_modified': 100, 'comment_count': 0},
+        {'id': 'b', 'last_modified': 200, 'comment_count': 3, **overrides},
+    ]
+
+
+def test_same_page_same_validators():
+    assert page_validators(rows(), COLUMNS, 'posts', 20) == page_validators(rows(), COLUMNS, 'posts', 20)
+
+
+def test_last_modified_is_newest_row():
+    assert page_validators(rows(), COLUMNS, 'posts')[1] == 200
+
+
+def test_author_or_counter_change_changes_etag():
+    etag, _ = page_validators(rows(), COLUMNS, 'posts')
+    # An author profile update raises the row's last_modified.
+    assert page_validators(rows(last_modified=250), COLUMNS, 'posts')[0] != etag
+    assert page_validators(rows(comment_count=4), COLUMNS, 'posts')[0] != etag
+
+
+def test_request_parts_change_etag():
+    assert page_validators(rows(), COLUMNS, 'posts', 20)[0] != page_validators(rows(), COLUMNS, 'posts', 10)[0]
+
+
+def test_empty_page():
+    etag, last_modified = page_validators([], COLUMNS, 'posts')
+    assert etag.startswith('"') and last_modified is None
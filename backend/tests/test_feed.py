@@ -0,0 +1,46 @@
+import asyncio
+
+import app.feed
+from app.cache import cache, unpack
+from app.feed import FEED_CACHE_KEY, FeedSnapshot
+
+
+def post(title: str) -> dict:
+    return {
+        'id': title, 'slug': title, 'title': title, 'tags': None, 'excerpt': None,
+        'reading_time': 1, 'comment_count': 0, 'user_name': 'author', 'user_email': 'author@example.com',
+        'user_image': None,
+    }
+
+
+def test_build_racing_an_invalidation_is_not_stored(monkeypatch):
+    feed = FeedSnapshot(limit=20, max_age=30)
+    titles = iter(['stale', 'fresh'])
+
+    async def fetch_post_page(db, limit):
+        title = next(titles)
+        if title == 'stale':
+            # A write lands after this build read the database.
+            await feed.invalidate()
+        return {'items': [post(title)], 'next_cursor': None}
+
+    monkeypatch.setattr(app.feed, 'fetch_post_page', fetch_post_page)
+    stored = []
+    cache_set = cache.set
+
+    async def set(key, value, ttl, tags=()):
+        if key == FEED_CACHE_KEY:
+            stored.append(unpack(value)[1])
+        await cache_set(key, value, ttl, tags)
+
+    monkeypatch.setattr(cache, 'set', set)
+
+    async def main():
+        await cache.delete(FEED_CACHE_KEY)
+        feed.refresh()
+        await feed._task
+
+    asyncio.run(main())
+    assert len(stored) == 1
+    assert b'"fresh"' in stored[0]
+    assert b'"fresh"' in feed.snapshot[0]
@@ -0,0 +1,110 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.http_client import HttpClient
+
+
+def make_client(handler) -> HttpClient:
+    return HttpClient(timeout=1.0, max_connections=1, retries=2, backoff=0, transport=httpx.MockTransport(handler))
+
+
+def run(client: HttpClient, method: str = 'GET', **kwargs) -> httpx.Response:
+    async def main():
+        try:
+            return await client.request(method, 'https://example.test/', **kwargs)
+        finally:
+            await client.close()
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize('status', [429, 502, 503, 504])
+def test_retries_transient_statuses(status):
+    statuses = [status, status, 200]
+
+    def handler(request):
+        return httpx.Response(statuses.pop(0))
+
+    response = run(make_client(handler))
+    assert response.status_code == 200
+    assert statuses == []
+
+
+def test_returns_last_transient_response_when_retries_run_out():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    response = run(make_client(handler))
+    assert response.status_code == 503
+    assert len(calls) == 3
+
+
+def test_does_not_retry_other_errors():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(500)
+
+    response = run(make_client(handler))
+    assert response.status_code == 500
+    assert len(calls) == 1
+
+
+def test_retries_transport_errors():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) < 3:
+            raise httpx.ConnectError('connection refused', request=request)
+        return httpx.Response(200)
+
+    assert run(make_client(handler)).status_code == 200
+    assert len(calls) == 3
+
+
+def test_raises_transport_error_when_retries_run_out():
+    def handler(request):
+        raise httpx.ConnectTimeout('timed out', request=request)
+
+    with pytest.raises(httpx.ConnectTimeout):
+        run(make_client(handler))
+
+
+def test_does_not_retry_post():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    assert run(make_client(handler), 'POST').status_code == 503
+    assert len(calls) == 1
+
+
+def test_does_not_replay_post_after_transport_error():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        raise httpx.ReadTimeout('timed out', request=request)
+
+    with pytest.raises(httpx.ReadTimeout):
+        run(make_client(handler), 'POST')
+    assert len(calls) == 1
+
+
+def test_retries_post_when_opted_in():
+    statuses = [503, 200]
+
+    def handler(request):
+        return httpx.Response(statuses.pop(0))
+
+    assert run(make_client(handler), 'POST', retry=True).status_code == 200
+    assert statuses == []
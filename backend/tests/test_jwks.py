@@ -0,0 +1,156 @@
+import asyncio
+import time
+
+from authlib.jose.errors import ExpiredTokenError, InvalidClaimError, JoseError
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+import httpx
+from jose import jwk, jwt
+import pytest
+from starlette.requests import Request
+
+from app.http_client import HttpClient
+from app.jwks import google_jwks
+from app.routers.auth import fetch_google_token, oauth
+from app.settings import settings
+
+
+NONCE = 'test-nonce'
+STATE = 'test-state'
+
+
+def make_key(kid: str) -> tuple[bytes, dict]:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    public_jwk = jwk.construct(public_pem, 'RS256').to_dict()
+    public_jwk.update(kid=kid, use='sig', alg='RS256')
+    return private_pem, public_jwk
+
+
+OLD_PEM, OLD_JWK = make_key('old-key')
+NEW_PEM, NEW_JWK = make_key('new-key')
+
+
+class Google:
+    '''Stands in for Google's token and JWKS endpoints.'''
+
+    def __init__(self):
+        self.published = [NEW_JWK]
+        self.id_token = None
+        self.jwks_fetches = 0
+
+    def jwks(self, request):
+        self.jwks_fetches += 1
+        return httpx.Response(200, json={'keys': self.published}, headers={'cache-control': 'max-age=3600'})
+
+    def token(self, request):
+        return httpx.Response(200, json={
+            'access_token': 'access-token',
+            'token_type': 'Bearer',
+            'expires_in': 3600,
+            'id_token': self.id_token,
+        })
+
+
+@pytest.fixture
+def google(monkeypatch):
+    google = Google()
+    monkeypatch.setattr(google_jwks, 'client', HttpClient(1.0, 1, 0, 0, transport=httpx.MockTransport(google.jwks)))
+    monkeypatch.setattr(google_jwks, 'min_refresh', 0)
+    monkeypatch.setitem(oauth.google_auth.client_kwargs, 'transport', httpx.MockTransport(google.token))
+    google_jwks.load({'keys': [NEW_JWK]})
+    return google
+
+
+def sign(pem: bytes = NEW_PEM, kid: str = 'new-key', **overrides) -> str:
+    now = int(time.time())
+    claims = {
+        'iss': 'https://accounts.google.com',
+        'aud': settings.GOOGLE_CLIENT_ID,
+        'sub': '1234567890',
+        'email': 'reader@example.com',
+        'nonce': NONCE,
+        'iat': now,
+        'exp': now + 600,
+        **overrides,
+    }
+    return jwt.encode(claims, pem, algorithm='RS256', headers={'kid': kid})
+
+
+def callback(google: Google, id_token: str) -> dict:
+    '''Run the /auth callback's token step for a login started with NONCE.'''
+    google.id_token = id_token
+
+    async def main():
+        request = Request({
+            'type': 'http',
+            'method': 'GET',
+            'path': '/auth',
+            'headers': [],
+            'query_string': f'code=auth-code&state={STATE}'.encode(),
+            'session': {},
+        })
+        await oauth.google_auth.save_authorize_data(
+            request, state=STATE, redirect_uri=settings.REDIRECT_URL, nonce=NONCE,
+        )
+        try:
+            return await fetch_google_token(request)
+        finally:
+            await google_jwks.client.close()
+
+    return asyncio.run(main())
+
+
+def test_accepts_valid_token(google):
+    user = callback(google, sign())['userinfo']
+    assert user['sub'] == '1234567890'
+    assert user['email'] == 'reader@example.com'
+    assert google.jwks_fetches == 0
+
+
+def test_cold_cache_fetches_keys(google):
+    google_jwks.load({'keys': []})
+    assert callback(google, sign())['userinfo']['sub'] == '1234567890'
+    assert google.jwks_fetches == 1
+
+
+def test_rotated_key_refreshes_cache(google):
+    google_jwks.load({'keys': [OLD_JWK]})
+    assert callback(google, sign())['userinfo']['sub'] == '1234567890'
+    assert google.jwks_fetches == 1
+    assert google_jwks.jwks == {'keys': [NEW_JWK]}
+
+
+def test_rejects_unknown_key(google):
+    with pytest.raises(ValueError):
+        callback(google, sign(OLD_PEM, 'old-key'))
+    assert google.jwks_fetches == 1
+
+
+def test_rejects_wrong_audience(google):
+    with pytest.raises(JoseError):
+        callback(google, sign(aud='someone-else'))
+
+
+def test_rejects_wrong_issuer(google):
+    with pytest.raises(InvalidClaimError):
+        callback(google, sign(iss='https://evil.example.com'))
+
+
+def test_rejects_wrong_nonce(google):
+    with pytest.raises(InvalidClaimError):
+        callback(google, sign(nonce='replayed'))
+
+
+def test_rejects_expired_token(google):
+    now = int(time.time())
+    with pytest.raises(ExpiredTokenError):
+        callback(google, sign(iat=now - 7200, exp=now - 3600))
@@ -0,0 +1,100 @@
+import re
+
+import pytest
+
+from app.render import render_content
+
+
+def html(content: str) -> str:
+    return render_content(content).html
+
+
+def tags(markup: str) -> list[str]:
+    return re.findall(r'<[^>]*>', markup)
+
+
+@pytest.mark.parametrize('url', [
+    'javascript:alert(1)',
+    'JavaScript:alert(1)',
+    ' javascript:alert(1)',
+    'java\tscript:alert(1)',
+    'jav&#x09;ascript:alert(1)',
+    '&#106;avascript:alert(1)',
+    'javascript&colon;alert(1)',
+    'vbscript:msgbox(1)',
+    'data:text/html;base64,PHNjcmlwdD5hbGVydCgxKTwvc2NyaXB0Pg==',
+])
+def test_drops_unsafe_urls(url):
+    rendered = html(f'<a href="{url}">link</a> <img src="{url}">')
+    assert 'href' not in rendered
+    assert 'src' not in rendered
+    assert 'link' in rendered
+
+
+@pytest.mark.parametrize('url', ['https://example.com/a?b=1&c=2', 'mailto:a@example.com', '/posts/x', '#top'])
+def test_keeps_safe_urls(url):
+    assert 'href=' in html(f'<a href="{url}">link</a>')
+
+
+def test_markdown_links_are_checked_too():
+    assert 'href' not in html('[click](javascript:alert(1))')
+    assert 'href="https://example.com"' in html('[click](https://example.com)')
+
+
+@pytest.mark.parametrize('payload', [
+    '<img src="/x.png" onerror="alert(1)">',
+    '<a href="/x" onclick="alert(1)" onmouseover=alert(1)>x</a>',
+    '<p style="background:url(javascript:alert(1))" ONLOAD="alert(1)">x</p>',
+    '<svg onload=alert(1)><circle /></svg>',
+    '<body onload=alert(1)>x</body>',
+])
+def test_drops_event_handlers_and_unknown_attributes(payload):
+    rendered = html(payload).lower()
+    assert 'on' not in ''.join(re.findall(r'\s(\w+)=', rendered)).replace('noopener', '')
+    assert 'alert' not in ''.join(tags(rendered))
+    assert 'style' not in rendered
+
+
+def test_drops_script_content_even_when_nested_or_unclosed():
+    # As in a browser, the first </script> ends the element; what follows is
+    # plain text, escaped like any other.
+    rendered = html('<div><script>alert(1)<script>alert(2)</script>alert(3)</script></div>after')
+    assert 'alert(1)' not in rendered
+    assert 'alert(2)' not in rendered
+    assert 'after' in rendered
+    assert 'script' not in rendered
+
+    rendered = html('before <script>alert(1)')
+    assert 'alert' not in rendered
+    assert 'before' in rendered
+
+
+def test_closes_unclosed_and_misnested_tags():
+    rendered = html('<p><b><i>bold italic</b> tail')
+    assert rendered.count('<b>') == rendered.count('</b>')
+    assert rendered.count('<i>') == rendered.count('</i>')
+    assert rendered.count('<p>') == rendered.count('</p>')
+
+
+def test_stray_closing_tags_are_dropped():
+    assert '</div>' not in html('text</div></b>')
+
+
+def test_entity_encoded_markup_stays_text():
+    rendered = html('&lt;script&gt;alert(1)&lt;/script&gt; &#60;img src=x onerror=alert(1)&#62;')
+    assert '<script' not in rendered
+    assert '<img' not in rendered
+    assert '&lt;script&gt;' in rendered
+    assert '&lt;img src=x onerror=alert(1)&gt;' in rendered
+
+
+def test_attribute_values_are_escaped():
+    rendered = html('<a href="/x" title="&quot;><script>alert(1)</script>">x</a>')
+    assert '<script' not in rendered
+    assert 'title="&quot;&gt;&lt;script&gt;' in rendered
+
+
+def test_plain_text_fields_ignore_dropped_content():
+    rendered = render_content('Hello <script>alert(1)</script> world')
+    assert rendered.excerpt == 'Hello world'
+    assert rendered.word_count == 2
@@ -0,0 +1,39 @@
+import re
+
+from app.render import render_content
+from app.routers.posts import HIGHLIGHT_START, HIGHLIGHT_STOP, highlight_snippet
+
+
+HOSTILE_BODY = '''
+Read <script>alert(document.cookie)</script> this **review**.
+
+<img src=x onerror="alert(1)"> and `<b>code</b>` &lt;script&gt;alert(2)&lt;/script&gt;
+'''
+
+
+def headline_text(content: str) -> str:
+    '''What the search query feeds to ts_headline: rendered HTML with its tags stripped.'''
+    return re.sub(r'<[^>]*>', ' ', render_content(content).html)
+
+
+def test_hostile_body_yields_no_markup():
+    text = headline_text(HOSTILE_BODY)
+    # Pretend Postgres marked "review" as the hit.
+    headline = text.replace('review', f'{HIGHLIGHT_START}review{HIGHLIGHT_STOP}')
+    snippet = highlight_snippet(headline)
+
+    assert '<mark>review</mark>' in snippet
+    assert re.sub(r'</?mark>', '', snippet).count('<') == 0
+    assert '&lt;b&gt;code&lt;/b&gt;' in snippet
+    assert '&lt;script&gt;alert(2)' in snippet
+    assert 'alert(document.cookie)' not in snippet
+    assert 'onerror' not in snippet
+
+
+def test_markup_in_headline_is_escaped():
+    headline = f'<img src=x onerror=alert(1)> {HIGHLIGHT_START}hit{HIGHLIGHT_STOP} &amp; more'
+    assert highlight_snippet(headline) == '&lt;img src=x onerror=alert(1)&gt; <mark>hit</mark> &amp; more'
+
+
+def test_missing_headline():
+    assert highlight_snippet(None) is None
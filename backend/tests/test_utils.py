@@ -0,0 +1,20 @@
+from app.utils import normalize_tags, tag_count_changes
+
+
+def test_normalize_tags():
+    assert normalize_tags(['python', ' fastapi', 'python', 'async ']) == ['async', 'fastapi', 'python']
+
+
+def test_normalize_empty_tags():
+    assert normalize_tags(None) is None
+    assert normalize_tags([]) is None
+    assert normalize_tags(['', '  ']) is None
+
+
+def test_tag_counts_follow_publishing():
+    assert tag_count_changes(None, False, ['a', 'b'], True) == ({'a', 'b'}, set())
+    assert tag_count_changes(None, False, ['a', 'b'], False) == (set(), set())
+    assert tag_count_changes(['a', 'b'], False, ['b', 'c'], False) == (set(), set())
+    assert tag_count_changes(['a', 'b'], True, ['b', 'c'], True) == ({'c'}, {'a'})
+    assert tag_count_changes(['a', 'b'], True, ['a', 'b'], False) == (set(), {'a', 'b'})
+    assert tag_count_changes(['a', 'b'], False, ['a'], True) == ({'a'}, set())